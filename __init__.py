@@ -2,4 +2,10 @@
 from . import models
 from . import controllers
 from . import services
-from . import utils
\ No newline at end of file
+from . import utils
+
+from .utils.pack import uninstall_kit_version_triggers
+
+
+def uninstall_hook(env):
+    uninstall_kit_version_triggers(env.cr)
@@ -2,7 +2,7 @@
 {
     'name': 'Odoo-PostNl Integration',
     'summary': 'Send confirmed sales orders to PostNL Fulfilment API',
-    'version': '1.0.0',
+    'version': '1.2.1',
     'category': 'Sales',
     'images': ['static/description/icon.png'],
     "author": "Managemyweb.co",
@@ -28,11 +28,15 @@
         'views/postnl_order_log_views.xml',
         'views/postnl_config_views.xml',
         'views/postnl_replenishment_views.xml',
+        'views/postnl_outbound_queue_views.xml',
+        'views/postnl_resend_wizard_views.xml',
 
         # 📂 Menus LAST
         'views/postnl_menu.xml',
     ],
 
+    'uninstall_hook': 'uninstall_hook',
+
     'installable': True,
     'application': True,
     'auto_install': False,
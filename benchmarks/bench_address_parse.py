@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of the address/name parsing done per order while building
+payloads (shipping and invoice partner):
+
+- before: regexes compiled on the fly and both partners parsed for every order
+- after:  utils.address.parse_partners, LRU-cached per (database, partner, write_date, address fields)
+
+Runs without Odoo:  python3 benchmarks/bench_address_parse.py [orders] [distinct partners]
+"""
+import importlib.util
+import os
+import random
+import re
+import sys
+import timeit
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location("postnl_address", os.path.join(HERE, "..", "utils", "address.py"))
+address = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(address)
+
+STREETS = ["Hoofdstraat", "Kerkstraat", "Dorpsstraat", "Molenweg", "Van Heemstraweg", "Julianalaan"]
+NAMES = ["Jan de Vries", "Sanne Jansen", "Pieter van den Berg", "Emma Visser", "Daan Smit", "Lotte Meijer"]
+
+
+class FakePartner:
+    """Just the attributes parse_partners reads from a res.partner."""
+
+    def __init__(self, pid, rnd):
+        self.id = pid
+        self.name = rnd.choice(NAMES)
+        self.street = f"{rnd.choice(STREETS)} {rnd.randint(1, 250)}{rnd.choice(['', '', 'A', ' bis'])}"
+        self.street2 = rnd.choice(["", "", "2e verdieping"])
+        self.write_date = datetime(2026, 1, 1)
+
+
+class FakeRecordset(list):
+    """A list of FakePartner with the env.cr.dbname parse_partners reads."""
+
+    class env:
+        class cr:
+            dbname = "bench"
+
+
+def split_street_before(street, street2=""):
+    full = " ".join([s for s in [street, street2] if s])
+    full = re.sub(r"\s+", " ", full).strip()
+    m = re.match(r"^(.*?)(?:\s+(\d+))(?:\s*([A-Za-z0-9\-\/]+))?$", full)
+    if not m:
+        return full[:30], 0, ""
+    return (m.group(1) or "").strip()[:30], int(m.group(2) or 0), (m.group(3) or "")[:30]
+
+
+def split_name_before(name):
+    name = (name or "").strip()
+    if not name:
+        return "", ""
+    parts = name.split()
+    return parts[0], " ".join(parts[1:]) if len(parts) > 1 else ""
+
+
+def before(batch):
+    out = {}
+    for ship, inv in batch:
+        for partner in (ship, inv):
+            out[partner.id] = split_name_before(partner.name) + split_street_before(partner.street, partner.street2)
+    return out
+
+
+def after(batch):
+    partners = FakeRecordset({p.id: p for pair in batch for p in pair}.values())
+    return address.parse_partners(partners)
+
+
+def run(orders=1000, distinct=50, number=20):
+    rnd = random.Random(7)
+    pool = [FakePartner(i, rnd) for i in range(1, distinct + 1)]
+    batch = [(rnd.choice(pool), rnd.choice(pool)) for _ in range(orders)]
+    assert before(batch) == after(batch)
+
+    results = {}
+    for label, func in (("before", before), ("after", after)):
+        seconds = min(timeit.repeat(lambda: func(batch), number=number, repeat=3))
+        results[label] = orders * number / seconds
+        print(f"{label:>6}: {results[label]:>10.0f} orders/s  ({orders} orders, {distinct} distinct partners)")
+    print(f"speedup: {results['after'] / results['before']:.1f}x  cache {address.cache_stats()}")
+    return results
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    )
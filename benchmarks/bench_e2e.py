@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end benchmark of the PostNL flows on an Odoo database with this module
+installed, against the local stub server of benchmarks/postnl_stub.py:
+
+- send_sale_order         PostNLClient.send_sale_order, one order per call
+- send_sale_orders        PostNLClient.send_sale_orders, --batch orders per call
+- send_replenishment      postnl.replenishment.service.send_replenishment (needs purchase)
+- receive_shipment        what the webhook controller does per request:
+                          looks_like_json_object + ingest_raw + _trigger_processing
+- process_shipment_queue  postnl.fulfilment.cron.run_process_shipment_queue, one chunk per call
+
+For every operation it reports items/s, p50/p95 latency per call and SQL
+queries per call (cursor.sql_log_count), so runs can be compared across
+commits (--json writes the numbers together with the current git commit).
+
+Synthetic data (partners, products, kits when mrp is installed, sale and
+purchase orders) is created in a single transaction with the registry in
+test mode, so the cron commits are skipped, and rolled back at the end:
+the database is left as it was.
+
+    python3 benchmarks/bench_e2e.py -c /etc/odoo/odoo.conf -d DB \\
+        [--orders 200] [--lines 5] [--batch 50] [--latency 30] [--error-rate 0] [--json out.json]
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import time
+
+from postnl_stub import StubServer, make_shipment_message
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Latency and query count of every call of one operation."""
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.results = {}
+
+    def measure(self, name, func, items=1):
+        queries = self.cr.sql_log_count
+        started = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - started
+        entry = self.results.setdefault(name, {"seconds": [], "queries": [], "items": 0})
+        entry["seconds"].append(elapsed)
+        entry["queries"].append(self.cr.sql_log_count - queries)
+        entry["items"] += items(value) if callable(items) else items
+        return value
+
+    def summary(self):
+        rows = {}
+        for name, entry in self.results.items():
+            total = sum(entry["seconds"])
+            rows[name] = {
+                "calls": len(entry["seconds"]),
+                "items": entry["items"],
+                "items_per_second": entry["items"] / total if total else 0.0,
+                "p50_ms": percentile(entry["seconds"], 50) * 1000,
+                "p95_ms": percentile(entry["seconds"], 95) * 1000,
+                "queries_per_call": sum(entry["queries"]) / len(entry["queries"]),
+            }
+        return rows
+
+
+def configure(env, stub, args):
+    company = env.company
+    env["postnl.config"].get_singleton()
+    params = {
+        "postnl.api_url": stub.url("/order"),
+        "postnl.inbound_url": stub.url("/replenishment"),
+        "postnl.api_key": "bench",
+        "postnl.customer_number": "10000000",
+        "postnl.merchant_code": "MRC1234",
+        "postnl.fulfilment_location": "BENCH",
+        "postnl.channel": "BENCH",
+        "postnl.default_product_code": "3085",
+        "postnl.allowed_base_urls": "",
+        "postnl.allowed_company_ids": json.dumps([company.id]),
+        "postnl.rate_limit_per_second": str(args.rate),
+        "postnl.breaker_failures": "0",
+        "postnl.send_concurrency": str(args.concurrency),
+        "postnl.http_pool_size": str(max(args.concurrency, 1)),
+        "postnl.queue_chunk_size": str(args.chunk),
+    }
+    icp = env["ir.config_parameter"].sudo()
+    for key, value in params.items():
+        icp.set_param(key, value)
+
+
+def make_fixture(env, args):
+    nl = env.ref("base.nl")
+    products = env["product.product"].create([
+        {
+            "name": f"Bench product {i}",
+            "default_code": f"BENCH-{i:04d}",
+            "type": "consu",
+            "weight": 0.25 + (i % 8) * 0.25,
+            "list_price": 10.0,
+        }
+        for i in range(args.products)
+    ])
+
+    if args.kits and "mrp.bom" in env:
+        kits = env["product.product"].create([
+            {"name": f"Bench kit {i}", "default_code": f"BENCH-KIT-{i:03d}", "type": "consu"}
+            for i in range(max(args.products // 10, 1))
+        ])
+        env["mrp.bom"].create([
+            {
+                "product_tmpl_id": kit.product_tmpl_id.id,
+                "type": "phantom",
+                "bom_line_ids": [
+                    (0, 0, {"product_id": products[(i * 3 + j) % len(products)].id, "product_qty": j + 1})
+                    for j in range(3)
+                ],
+            }
+            for i, kit in enumerate(kits)
+        ])
+        products |= kits
+
+    partners = env["res.partner"].create([
+        {
+            "name": f"Bench Klant {i}",
+            "street": f"Hoofdstraat {i % 300 + 1}{'A' if i % 7 == 0 else ''}",
+            "zip": f"{1000 + i % 9000}AB",
+            "city": "Utrecht",
+            "country_id": nl.id,
+            "email": f"klant{i}@example.com",
+            "phone": "+31612345678",
+        }
+        for i in range(args.orders)
+    ])
+
+    def orders(count):
+        return env["sale.order"].create([
+            {
+                "partner_id": partners[i % len(partners)].id,
+                "order_line": [
+                    (0, 0, {"product_id": products[(i + j) % len(products)].id, "product_uom_qty": 1 + j % 3})
+                    for j in range(args.lines)
+                ],
+            }
+            for i in range(count)
+        ])
+
+    single, batched = orders(args.orders), orders(args.orders)
+
+    purchases = None
+    if "purchase.order" in env:
+        vendor = env["res.partner"].create({"name": "Bench Supplier"})
+        purchases = env["purchase.order"].create([
+            {
+                "partner_id": vendor.id,
+                "order_line": [
+                    (0, 0, {
+                        "product_id": products[(i + j) % len(products)].id,
+                        "product_qty": 10 + j,
+                        "price_unit": 5.0,
+                    })
+                    for j in range(args.lines * 4)
+                ],
+            }
+            for i in range(max(args.orders // 10, 1))
+        ])
+    return single, batched, purchases
+
+
+def run(env, args):
+    cr = env.cr
+    recorder = Recorder(cr)
+
+    with StubServer(latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate, seed=42) as stub:
+        configure(env, stub, args)
+        single, batched, purchases = make_fixture(env, args)
+        env.flush_all()
+
+        from odoo.addons.postnl_odoo_integration.services.postnl_client import PostNLClient
+        from odoo.addons.postnl_odoo_integration.utils.webhook import looks_like_json_object
+
+        client = PostNLClient(env)
+        for order in single:
+            recorder.measure("send_sale_order", lambda: client.send_sale_order(order))
+
+        for start in range(0, len(batched), args.batch):
+            chunk = batched[start:start + args.batch]
+            recorder.measure("send_sale_orders", lambda: client.send_sale_orders(chunk), items=len(chunk))
+
+        if purchases:
+            Replenishment = env["postnl.replenishment"]
+            service = env["postnl.replenishment.service"]
+            config = env["postnl.config"].get_snapshot()
+            for po in purchases:
+                rec = Replenishment.create({
+                    "name": po.name,
+                    "purchase_order_id": po.id,
+                    "merchant_code": config.merchant_code,
+                    "fulfilment_location": config.fulfilment_location,
+                })
+                recorder.measure("send_replenishment", lambda: service.send_replenishment(rec))
+        else:
+            print("purchase is not installed: send_replenishment skipped")
+
+        # shipment webhooks for every order sent above
+        Queue = env["postnl.fulfilment.shipment.queue"].sudo()
+        order_numbers = [o.postnl_order_number or o.name for o in single | batched]
+        per_message = max(args.orders_per_message, 1)
+        for message_no, start in enumerate(range(0, len(order_numbers), per_message), start=1):
+            raw = make_shipment_message(message_no, order_numbers[start:start + per_message])
+
+            def receive():
+                if looks_like_json_object(raw) and Queue.ingest_raw(raw):
+                    Queue._trigger_processing()
+
+            recorder.measure("receive_shipment", receive)
+
+        cron = env["postnl.fulfilment.cron"]
+        while True:
+            stats = recorder.measure(
+                "process_shipment_queue",
+                lambda: cron.run_process_shipment_queue(limit=args.chunk, time_budget=3600),
+                items=lambda res: res["processed"],
+            )
+            if not stats["processed"]:
+                break
+
+        stub_counts = dict(stub.config.counts)
+
+    return recorder.summary(), stub_counts
+
+
+def print_summary(rows):
+    header = f"{'operation':<24} {'calls':>6} {'items':>6} {'items/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in rows.items():
+        print(
+            f"{name:<24} {row['calls']:>6} {row['items']:>6} {row['items_per_second']:>9.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['queries_per_call']:>8.1f}"
+        )
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-c", "--config", help="Odoo configuration file (addons path, db credentials)")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--orders", type=int, default=200, help="orders per send benchmark")
+    parser.add_argument("--lines", type=int, default=5, help="lines per order")
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--kits", action="store_true", help="add phantom BoM kits (needs mrp)")
+    parser.add_argument("--batch", type=int, default=50, help="orders per send_sale_orders call")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0.0, help="postnl.rate_limit_per_second (0 = off)")
+    parser.add_argument("--chunk", type=int, default=20, help="shipment jobs per queue chunk")
+    parser.add_argument("--orders-per-message", type=int, default=1, help="orderStatus items per webhook")
+    parser.add_argument("--latency", type=float, default=30.0, help="stub latency in ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="stub latency jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub answers that are 500")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    import odoo
+    from odoo import SUPERUSER_ID, api
+    from odoo.modules.registry import Registry
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    registry = Registry(args.database)
+
+    with registry.cursor() as cr:
+        registry.enter_test_mode(cr)
+        try:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            rows, stub_counts = run(env, args)
+        finally:
+            registry.leave_test_mode()
+            cr.rollback()
+
+    print_summary(rows)
+    print(f"stub answers: {stub_counts}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"commit": git_commit(), "args": vars(args), "results": rows, "stub": stub_counts}, f, indent=2)
+        print(f"written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Size reduction of the compressed payload columns on a synthetic but realistic
+dataset: outbound order payloads, PostNL responses and shipment messages shaped
+like the ones this module stores.
+
+Runs without Odoo:  python3 benchmarks/bench_payload_compression.py [rows]
+
+PostgreSQL already pglz-compresses TOASTed values (roughly > 2 kB), so on a real
+database compare with the sizes logged by migrations/1.1.0/pre-migrate.py,
+which uses pg_column_size before and after the conversion.
+"""
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location("postnl_compress", os.path.join(HERE, "..", "utils", "compress.py"))
+compress = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(compress)
+
+STREETS = ["Hoofdstraat", "Kerkstraat", "Dorpsstraat", "Molenweg", "Stationsplein", "Julianalaan"]
+CITIES = ["Amsterdam", "Rotterdam", "Utrecht", "Eindhoven", "Groningen", "Zwolle"]
+NAMES = ["Jan de Vries", "Sanne Jansen", "Pieter Bakker", "Emma Visser", "Daan Smit", "Lotte Meijer"]
+
+
+def _address(rnd):
+    name = rnd.choice(NAMES).split()
+    return {
+        "firstName": name[0],
+        "lastName": " ".join(name[1:]),
+        "street": rnd.choice(STREETS),
+        "houseNumber": rnd.randint(1, 250),
+        "houseNumberAddition": rnd.choice(["", "", "A", "bis"]),
+        "postalCode": f"{rnd.randint(1000, 9999)}{rnd.choice('ABCDEFGH')}{rnd.choice('KLMNPRST')}",
+        "city": rnd.choice(CITIES),
+        "countryCode": "NL",
+        "phoneNumber": f"+316{rnd.randint(10000000, 99999999)}",
+        "email": f"customer{rnd.randint(1, 99999)}@example.com",
+    }
+
+
+def order_payload(rnd, n):
+    number = f"S{n:05d}"
+    return json.dumps({
+        "orderNumber": number,
+        "webOrderNumber": number,
+        "merchantCode": "MRC1234",
+        "fulfilmentLocation": "FL01",
+        "channel": "WEB",
+        "productCode": rnd.choice(["3085", "3189", "4945"]),
+        "orderDateTime": "2026-10-18T10:15:00",
+        "orderLines": [
+            {"SKU": f"SKU-{rnd.randint(1, 5000):05d}", "quantity": rnd.randint(1, 6)}
+            for _ in range(rnd.randint(1, 12))
+        ],
+        "shipToAddress": _address(rnd),
+        "invoiceAddress": _address(rnd),
+    }, ensure_ascii=False)
+
+
+def response_body(rnd, n):
+    return json.dumps({"orderNumber": f"S{n:05d}", "status": "Accepted", "messages": []})
+
+
+def shipment_message(rnd, n):
+    return json.dumps({
+        "merchantCode": "MRC1234",
+        "type": "shipment",
+        "messageNo": str(n),
+        "date": "2026-10-18",
+        "time": "10:15:00",
+        "orderStatus": [
+            {
+                "orderNo": f"S{n * 3 + i:05d}",
+                "shipDate": "2026-10-18",
+                "shipTime": "10:14:00",
+                "trackAndTraceCode": f"3SABCD{rnd.randint(1000000, 9999999)}",
+            }
+            for i in range(rnd.randint(1, 5))
+        ],
+    })
+
+
+def run(rows=20000, seed=42):
+    rnd = random.Random(seed)
+    total_raw = total_z = 0
+    for label, make, level in (
+        ("order log request_payload", order_payload, 6),
+        ("order log response_body", response_body, 6),
+        ("shipment queue payload", shipment_message, 1),
+    ):
+        values = [make(rnd, n).encode("utf-8") for n in range(rows)]
+        plain = sum(len(zlib.compress(v, level)) for v in values)
+        started = time.perf_counter()
+        compressed = [compress.compress_bytes(v, level) for v in values]
+        elapsed = time.perf_counter() - started
+        assert compress.decompress_text(compressed[0]) == values[0].decode("utf-8")
+        raw = sum(len(v) for v in values)
+        z = sum(len(c) for c in compressed)
+        total_raw += raw
+        total_z += z
+        print(
+            f"{label:<28} {raw / 1e6:8.2f} MB -> {z / 1e6:6.2f} MB  "
+            f"({raw / z:4.1f}x, plain zlib {raw / plain:4.1f}x, {rows / elapsed:,.0f} rows/s, level {level})"
+        )
+    print(f"{'total':<28} {total_raw / 1e6:8.2f} MB -> {total_z / 1e6:6.2f} MB  ({total_raw / total_z:4.1f}x)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
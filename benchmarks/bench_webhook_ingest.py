@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of the CPU spent per shipment webhook before the INSERT:
+
+- before: decode + json.loads + json.dumps (old receive_shipment / create_from_webhook)
+- after:  utils.webhook.extract_meta (top-level keys only) + the raw bytes stored as is
+
+Runs without Odoo:  python3 benchmarks/bench_webhook_ingest.py [orderStatus items]
+"""
+import importlib.util
+import json
+import os
+import sys
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load(relpath, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, "..", relpath))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+webhook = _load("utils/webhook.py", "postnl_webhook")
+
+
+def make_message(items=5, message_no=1):
+    return json.dumps({
+        "merchantCode": "MRC1234",
+        "type": "shipment",
+        "messageNo": str(message_no),
+        "date": "2026-10-18",
+        "time": "10:15:00",
+        "orderStatus": [
+            {
+                "orderNo": f"SO{10000 + i}",
+                "status": "Shipped",
+                "shipDate": "2026-10-18",
+                "shipTime": "10:14:00",
+                "trackAndTraceCode": f"3SABCD{1000000 + i}",
+                "shipmentLines": [
+                    {"SKU": f"SKU-{i}-{j}", "quantity": j + 1} for j in range(3)
+                ],
+            }
+            for i in range(items)
+        ],
+    }).encode("utf-8")
+
+
+def before(raw):
+    payload = json.loads(raw.decode("utf-8"))
+    return json.dumps(payload), payload.get("messageNo"), payload.get("merchantCode")
+
+
+def after(raw):
+    if not webhook.looks_like_json_object(raw):
+        return None
+    meta = webhook.extract_meta(raw)
+    return raw.decode("utf-8"), meta["messageNo"], meta["merchantCode"]
+
+
+def run(items=5, number=20000):
+    raw = make_message(items)
+    assert before(raw)[1:] == after(raw)[1:]
+    results = {}
+    for label, func in (("before", before), ("after", after)):
+        seconds = min(timeit.repeat(lambda: func(raw), number=number, repeat=3))
+        results[label] = number / seconds
+        print(f"{label:>6}: {results[label]:>10.0f} msg/s  ({len(raw)} bytes, {items} orderStatus items)")
+    print(f"speedup: {results['after'] / results['before']:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
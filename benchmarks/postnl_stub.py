@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the PostNL fulfilment API, for benchmarks and load tests.
+
+Endpoints (any path ending with):
+- /order          outbound sale orders      -> 202 {"orderNumber": ...}
+- /replenishment  inbound replenishments    -> 202 {"orderNumber": ...}
+- /shipment       shipment webhook receiver -> 202 (counts messages only)
+
+Latency and failures are configurable: every request sleeps latency ms
+(+- jitter), then answers 500 with probability error_rate or 429 (with a
+Retry-After header) with probability throttle_rate.
+
+Standalone:  python3 benchmarks/postnl_stub.py --port 8899 --latency 40 --error-rate 0.01
+In-process:  with StubServer(latency_ms=40) as stub: ... stub.url("/order") ...
+
+make_shipment_message() builds webhook bodies in the format PostNL sends.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+    def __init__(self, latency_ms=30.0, jitter_ms=10.0, error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.uniform(-self.jitter_ms, self.jitter_ms)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        config = self.server.stub_config
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path.rstrip("/")
+        endpoint = next((name for name in ("order", "replenishment", "shipment") if path.endswith("/" + name)), None)
+        if endpoint is None:
+            config.count("404")
+            return self._reply(404, {"message": "Unknown endpoint"})
+
+        roll, jitter = config.draw()
+        time.sleep(max(config.latency_ms + jitter, 0.0) / 1000.0)
+
+        if roll < config.error_rate:
+            config.count(f"{endpoint}:500")
+            return self._reply(500, {"message": "Internal Server Error"})
+        if roll < config.error_rate + config.throttle_rate:
+            config.count(f"{endpoint}:429")
+            return self._reply(429, {"message": "Too Many Requests"}, [("Retry-After", str(config.retry_after))])
+
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            config.count(f"{endpoint}:400")
+            return self._reply(400, {"message": "Invalid JSON"})
+
+        config.count(f"{endpoint}:202")
+        return self._reply(202, {"orderNumber": payload.get("orderNumber"), "status": "Accepted", "messages": []})
+
+
+class StubServer:
+    """Threaded stub server on 127.0.0.1, usable as a context manager."""
+
+    def __init__(self, port=0, **config):
+        self.config = StubConfig(**config)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub_config = self.config
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="postnl-stub", daemon=True)
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}/v2/fulfilment{path}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def make_shipment_message(message_no, order_numbers, merchant_code="MRC1234"):
+    """Shipment webhook body (bytes) for the given orderNo values."""
+    return json.dumps({
+        "merchantCode": merchant_code,
+        "type": "shipment",
+        "messageNo": str(message_no),
+        "date": time.strftime("%Y-%m-%d"),
+        "time": time.strftime("%H:%M:%S"),
+        "orderStatus": [
+            {
+                "orderNo": order_no,
+                "status": "Shipped",
+                "shipDate": time.strftime("%Y-%m-%d"),
+                "shipTime": time.strftime("%H:%M:%S"),
+                "trackAndTraceCode": f"3SBENCH{message_no:06d}{i:03d}",
+            }
+            for i, order_no in enumerate(order_numbers)
+        ],
+    }).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", type=float, default=30.0, help="ms per request")
+    parser.add_argument("--jitter", type=float, default=10.0, help="+- ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of 429 answers (s)")
+    args = parser.parse_args()
+
+    stub = StubServer(
+        port=args.port, latency_ms=args.latency, jitter_ms=args.jitter,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+    )
+    print(f"PostNL stub on {stub.url('/order')} and {stub.url('/replenishment')} (Ctrl+C to stop)")
+    try:
+        stub.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.httpd.server_close()
+        print(json.dumps(stub.config.counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,3 @@
 # -*- coding: utf-8 -*-
 from . import postnl_fulfilment_receiver
+from . import postnl_metrics
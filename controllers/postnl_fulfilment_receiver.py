@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
-import json
 import logging
 from odoo import http
 from odoo.http import request
 
+from ..utils.webhook import looks_like_json_object
+
 _logger = logging.getLogger(__name__)
 
 class PostNLFulfilmentReceiver(http.Controller):
@@ -12,16 +13,26 @@ class PostNLFulfilmentReceiver(http.Controller):
     def receive_shipment(self, **kwargs):
         # security header (PDF: webhook uses apikey provided by client)
         incoming_key = request.httprequest.headers.get("apikey", "")
-        expected_key = request.env["ir.config_parameter"].sudo().get_param("postnl_base.fulfilment_webhook_key") or ""
+        expected_key = request.env["postnl.config"].sudo().get_snapshot().webhook_key
         if expected_key and incoming_key != expected_key:
             return request.make_response("Unauthorized", headers=[("Content-Type", "text/plain")], status=401)
 
+        # Fast path: keep the raw body, the cron does the full JSON parse.
+        # Retried messages are dropped by the unique message key and still get 202.
+        raw = request.httprequest.get_data() or b"{}"
+        if not looks_like_json_object(raw):
+            _logger.warning("Invalid shipment message body (%s bytes)", len(raw))
+            return request.make_response("Bad Request", headers=[("Content-Type", "text/plain")], status=400)
+
+        Queue = request.env["postnl.fulfilment.shipment.queue"].sudo()
         try:
-            raw = request.httprequest.data.decode("utf-8") if request.httprequest.data else "{}"
-            payload = json.loads(raw)
-        except Exception as e:
-            _logger.exception("Invalid JSON: %s", e)
+            job_id = Queue.ingest_raw(raw)
+        except UnicodeDecodeError as e:
+            _logger.warning("Invalid shipment message encoding: %s", e)
             return request.make_response("Bad Request", headers=[("Content-Type", "text/plain")], status=400)
 
-        request.env["postnl.fulfilment.shipment.queue"].sudo().create_from_webhook(payload)
-        return request.make_response("OK", headers=[("Content-Type", "text/plain")], status=200)
+        # process right after this request commits, not at the next hourly run
+        if job_id:
+            Queue._trigger_processing()
+
+        return request.make_response("Accepted", headers=[("Content-Type", "text/plain")], status=202)
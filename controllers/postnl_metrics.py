@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import hmac
+
+from odoo import http
+from odoo.http import request
+
+from ..services.postnl_http import breaker_stats
+
+# (queue label, table); state counts are read from the database at scrape time
+QUEUE_TABLES = [
+    ("outbound", "postnl_outbound_queue"),
+    ("shipment", "postnl_fulfilment_shipment_queue"),
+    ("replenishment", "postnl_replenishment"),
+]
+
+
+class PostNLMetrics(http.Controller):
+
+    @http.route("/postnl/metrics", type="http", auth="public", csrf=False, methods=["GET"])
+    def metrics(self, **kwargs):
+        """
+        Prometheus text format. Counters and histograms are the totals of
+        every worker process (postnl.metric) and queue gauges come from the
+        queue tables, so any HTTP worker gives the same answer; only
+        postnl_circuit_open is the state of the answering process.
+        Disabled until postnl.metrics_token is set.
+        """
+        expected = request.env["postnl.config"].sudo().get_snapshot().metrics_token
+        if not expected:
+            return request.make_response("Forbidden", headers=[("Content-Type", "text/plain")], status=403)
+        incoming = request.httprequest.headers.get("Authorization", "")
+        if not hmac.compare_digest(incoming.encode("utf-8"), f"Bearer {expected}".encode("utf-8")):
+            return request.make_response("Unauthorized", headers=[("Content-Type", "text/plain")], status=401)
+
+        items, attempts = [], []
+        cr = request.env.cr
+        for queue, table in QUEUE_TABLES:
+            cr.execute(f"SELECT state, count(*), coalesce(sum(attempts), 0) FROM {table} GROUP BY state")
+            for state, count, state_attempts in cr.fetchall():
+                items.append(("postnl_queue_items", {"queue": queue, "state": state}, count))
+                attempts.append(("postnl_queue_attempts", {"queue": queue, "state": state}, state_attempts))
+        gauges = items + attempts
+
+        for endpoint, stats in breaker_stats().items():
+            gauges.append(("postnl_circuit_open", {"url": endpoint}, 0 if stats["state"] == "closed" else 1))
+
+        return request.make_response(
+            request.env["postnl.metric"].sudo()._render(gauges),
+            headers=[("Content-Type", "text/plain; version=0.0.4; charset=utf-8")],
+        )
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Move PostNL payload Text columns into zlib-compressed bytea columns."""
+import logging
+
+from psycopg2.extras import execute_values
+
+from odoo.addons.postnl_odoo_integration.utils.compress import compress_text
+from odoo.tools.sql import column_exists, create_column
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+COLUMNS = [
+    # (table, old Text column, new compressed column)
+    ("postnl_order_log", "request_payload", "request_payload_z"),
+    ("postnl_order_log", "response_body", "response_body_z"),
+    ("postnl_replenishment", "request_payload", "request_payload_z"),
+    ("postnl_fulfilment_shipment_queue", "payload", "payload_z"),
+]
+
+
+def _compress_column(cr, table, old, new):
+    if not column_exists(cr, table, old):
+        return
+    if not column_exists(cr, table, new):
+        create_column(cr, table, new, "bytea")
+
+    # pg_column_size = on-disk size, i.e. after TOAST's own pglz compression
+    cr.execute(f'SELECT count("{old}"), coalesce(sum(pg_column_size("{old}")), 0) FROM "{table}"')
+    rows_total, size_before = cr.fetchone()
+
+    last_id = 0
+    while True:
+        cr.execute(
+            f'SELECT id, "{old}" FROM "{table}" WHERE id > %s AND "{old}" IS NOT NULL ORDER BY id LIMIT %s',
+            (last_id, BATCH_SIZE),
+        )
+        rows = cr.fetchall()
+        if not rows:
+            break
+        execute_values(
+            cr._obj,
+            f'UPDATE "{table}" AS t SET "{new}" = v.data FROM (VALUES %s) AS v(id, data) WHERE t.id = v.id',
+            [(row_id, compress_text(text) or None) for row_id, text in rows],
+            template="(%s, %s::bytea)",
+        )
+        last_id = rows[-1][0]
+
+    cr.execute(f'SELECT coalesce(sum(pg_column_size("{new}")), 0) FROM "{table}"')
+    size_after = cr.fetchone()[0]
+    cr.execute(f'ALTER TABLE "{table}" DROP COLUMN "{old}"')
+
+    _logger.info(
+        "[PostNL] Compressed %s.%s: %s rows, %.1f MB -> %.1f MB (%.1fx); run VACUUM FULL to return the space",
+        table, old, rows_total, size_before / 1e6, size_after / 1e6,
+        (size_before / size_after) if size_after else 0.0,
+    )
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    for table, old, new in COLUMNS:
+        _compress_column(cr, table, old, new)
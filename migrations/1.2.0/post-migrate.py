@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""Fill the new stored fulfilment columns of postnl.order.log from sale.order."""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute(
+        """
+        UPDATE postnl_order_log l
+           SET so_postnl_fulfilment_status = so.postnl_fulfilment_status,
+               so_postnl_fulfilment_order_no = so.postnl_fulfilment_order_no,
+               so_postnl_message_no = so.postnl_message_no,
+               so_postnl_ship_date = so.postnl_ship_date,
+               so_postnl_ship_time = so.postnl_ship_time,
+               so_postnl_track_trace_code = so.postnl_track_trace_code,
+               so_postnl_track_trace_url = so.postnl_track_trace_url,
+               so_postnl_last_webhook_at = so.postnl_last_webhook_at
+          FROM sale_order so
+         WHERE so.id = l.sale_order_id
+        """
+    )
+    _logger.info("[PostNL] Filled fulfilment snapshot columns on %s order logs", cr.rowcount)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Keep the replenishment dispatch cron away from rows created before it existed.
+
+Before 1.2.0 replenishments were sent inline; a draft or error row left from
+that time was abandoned or already handled by hand. The dispatch cron claims
+every draft / error row without next_attempt_at, so those rows would all be
+sent to PostNL on upgrade. They are moved to dead instead.
+
+Outbound jobs that used up their attempts stayed "failed"; they get the new
+"dead" state so the queue view and the resend wizard can find them.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute(
+        """
+        UPDATE postnl_outbound_queue
+           SET state = 'dead'
+         WHERE state = 'failed'
+           AND attempts >= COALESCE(
+                (SELECT NULLIF(value, '')::int FROM ir_config_parameter WHERE key = 'postnl.outbound_max_attempts'), 5)
+        """
+    )
+    _logger.info("[PostNL] Marked %s exhausted outbound jobs dead", cr.rowcount)
+    # installed version, e.g. 18.0.1.1.0: the last three parts are the module's own
+    if tuple(int(part) for part in version.split(".")[-3:]) >= (1, 2, 0):
+        return
+    cr.execute(
+        """
+        UPDATE postnl_replenishment
+           SET state = 'dead',
+               next_attempt_at = NULL,
+               response_message = concat_ws(E'\n', response_message,
+                                            'Not sent: created before the replenishment queue (module upgrade).')
+         WHERE state IN ('draft', 'error')
+        """
+    )
+    _logger.info("[PostNL Repl] Moved %s replenishments from before the dispatch queue to dead", cr.rowcount)
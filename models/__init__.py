@@ -10,3 +10,10 @@ from . import purchase_order
 from . import sale_order_postnl_fulfilment
 from . import postnl_fulfilment_cron
 from . import postnl_fulfilment_queue
+from . import postnl_outbound_queue
+from . import product_product
+from . import postnl_retention
+from . import postnl_resend_wizard
+from . import postnl_rate_bucket
+from . import postnl_metric
+from . import ir_cron
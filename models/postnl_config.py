@@ -1,7 +1,75 @@
 # -*- coding: utf-8 -*-
 
 import json
-from odoo import api, fields, models
+from dataclasses import dataclass
+
+from odoo import api, fields, models, tools
+
+from ..services.postnl_http import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    BreakerPolicy,
+    RateLimit,
+    normalize_base_url,
+)
+
+DEFAULT_INBOUND_URL = "https://api-sandbox.postnl.nl/v2/fulfilment/replenishment"
+
+
+@dataclass(frozen=True)
+class PostNLSnapshot:
+    """Immutable, pre-parsed view of the postnl.* parameters.
+
+    Built once per registry by PostNLConfig.get_snapshot() and dropped with the
+    registry cache whenever a parameter or the configuration record changes.
+    """
+
+    config_id: int
+    api_url: str
+    api_key: str
+    customer_number: str
+    merchant_code: str
+    fulfilment_location: str
+    channel: str
+    default_product_code: str
+    inbound_url: str
+    webhook_key: str
+    metrics_token: str
+    address_cache_size: int
+
+    web_base_url: str
+    allowed_base_urls: frozenset
+    allowed_company_ids: frozenset
+
+    http_pool_size: int
+    timeouts: tuple
+    send_concurrency: int
+    outbound_max_attempts: int
+    queue_max_attempts: int
+    queue_backoff_seconds: int
+    queue_chunk_size: int
+    queue_time_budget: float
+    retention_mode: str
+    retention_days_success: int
+    retention_days_failed: int
+    retention_batch_size: int
+    replenishment_max_lines: int
+    replenishment_max_bytes: int
+    # per worker process: the orders API (api_url) and the inbound API (inbound_url)
+    rate_limit: RateLimit
+    inbound_rate_limit: RateLimit
+    # one breaker per endpoint and process, all with this policy
+    breaker: BreakerPolicy
+
+    @property
+    def instance_allowed(self):
+        """Empty URL guard => allow, otherwise web.base.url must be listed."""
+        return not self.allowed_base_urls or self.web_base_url in self.allowed_base_urls
+
+    def is_company_allowed(self, company_id):
+        # SAFE DEFAULT: missing config or empty allowed list -> not allowed
+        return bool(self.config_id) and company_id in self.allowed_company_ids
 
 
 class PostNLConfig(models.Model):
@@ -52,6 +120,110 @@ class PostNLConfig(models.Model):
 
     rule_ids = fields.One2many("postnl.shipping.rule", "config_id", string="Weight Rules")
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    def get_snapshot(self):
+        """Cached PostNLSnapshot; ir.config_parameter writes clear the registry cache too."""
+        return self.sudo()._get_snapshot()
+
+    @tools.ormcache()
+    def _get_snapshot(self):
+        icp = self.env["ir.config_parameter"].sudo()
+        config = self.search([], limit=1)
+
+        def _int(key, default):
+            try:
+                return int(icp.get_param(key) or default)
+            except ValueError:
+                return default
+
+        def _float(key, default):
+            try:
+                return float(icp.get_param(key) or default)
+            except ValueError:
+                return default
+
+        allowed = (icp.get_param("postnl.allowed_base_urls") or "").strip()
+
+        # postnl.rate_limit_per_second is the account quota, shared by every
+        # process (HTTP and cron workers) through postnl.rate.bucket
+        def _rate_limit(prefix):
+            rate = _float(f"postnl.{prefix}_per_second", _float("postnl.rate_limit_per_second", 10.0))
+            return RateLimit(
+                rate=rate,
+                burst=_int(f"postnl.{prefix}_burst", _int("postnl.rate_limit_burst", 10)),
+                max_retries=_int("postnl.retry_429_max", 3),
+                max_retry_after=_float("postnl.retry_after_max", 60.0),
+                dbname=self.env.cr.dbname,
+            )
+
+        return PostNLSnapshot(
+            config_id=config.id,
+            api_url=icp.get_param("postnl.api_url", "") or "",
+            api_key=icp.get_param("postnl.api_key", "") or "",
+            customer_number=icp.get_param("postnl.customer_number", "") or "",
+            merchant_code=icp.get_param("postnl.merchant_code", "") or "",
+            fulfilment_location=icp.get_param("postnl.fulfilment_location", "") or "",
+            channel=icp.get_param("postnl.channel", "") or "",
+            default_product_code=icp.get_param("postnl.default_product_code", "") or "",
+            inbound_url=icp.get_param("postnl.inbound_url") or DEFAULT_INBOUND_URL,
+            webhook_key=icp.get_param("postnl_base.fulfilment_webhook_key") or "",
+            metrics_token=icp.get_param("postnl.metrics_token") or "",
+            address_cache_size=_int("postnl.address_cache_size", 4096),
+            web_base_url=normalize_base_url(icp.get_param("web.base.url")),
+            allowed_base_urls=frozenset(normalize_base_url(u) for u in allowed.split(",") if u.strip()),
+            allowed_company_ids=frozenset(self._decode_company_ids(icp.get_param("postnl.allowed_company_ids", "[]"))),
+            http_pool_size=_int("postnl.http_pool_size", DEFAULT_POOL_SIZE),
+            timeouts=(
+                _float("postnl.connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+                _float("postnl.read_timeout", _float("postnl.timeout", DEFAULT_READ_TIMEOUT)),
+            ),
+            send_concurrency=_int("postnl.send_concurrency", 4),
+            outbound_max_attempts=_int("postnl.outbound_max_attempts", 5),
+            queue_max_attempts=_int("postnl.queue_max_attempts", 8),
+            queue_backoff_seconds=_int("postnl.queue_backoff_seconds", 60),
+            queue_chunk_size=_int("postnl.queue_chunk_size", 20),
+            # well under Odoo's cron limits (limit_time_cpu 60s, limit_time_real 120s)
+            queue_time_budget=_float("postnl.queue_time_budget", 45.0),
+            retention_mode=(icp.get_param("postnl.retention_mode") or "delete").strip().lower(),
+            retention_days_success=_int("postnl.retention_days_success", 90),
+            retention_days_failed=_int("postnl.retention_days_failed", 365),
+            retention_batch_size=_int("postnl.retention_batch_size", 5000),
+            replenishment_max_lines=_int("postnl.replenishment_max_lines", 200),
+            replenishment_max_bytes=_int("postnl.replenishment_max_bytes", 256000),
+            rate_limit=_rate_limit("rate_limit"),
+            inbound_rate_limit=_rate_limit("inbound_rate_limit"),
+            breaker=BreakerPolicy(
+                threshold=_int("postnl.breaker_failures", 5),
+                reset_seconds=_float("postnl.breaker_reset_seconds", 30.0),
+            ),
+        )
+
+    @api.model
+    def _decode_company_ids(self, raw):
+        try:
+            ids = json.loads(raw or "[]")
+            if not isinstance(ids, list):
+                ids = []
+        except Exception:
+            ids = []
+        return ids
+
     @api.model
     def get_singleton(self):
         rec = self.search([], limit=1)
@@ -70,23 +242,13 @@ class PostNLConfig(models.Model):
             rec.channel = icp.get_param("postnl.channel", "")
             rec.default_product_code = icp.get_param("postnl.default_product_code", "")
 
-            rec.postnl_inbound_url = icp.get_param(
-                "postnl.inbound_url",
-                "https://api-sandbox.postnl.nl/v2/fulfilment/replenishment",
-            )
+            rec.postnl_inbound_url = icp.get_param("postnl.inbound_url", DEFAULT_INBOUND_URL)
 
             # ✅ URL Guard param
             rec.allowed_base_urls = icp.get_param("postnl.allowed_base_urls", "")
 
             # ✅ allowed companies stored as JSON list in ir.config_parameter
-            raw = icp.get_param("postnl.allowed_company_ids", "[]") or "[]"
-            try:
-                ids = json.loads(raw)
-                if not isinstance(ids, list):
-                    ids = []
-            except Exception:
-                ids = []
-            rec.allowed_company_ids = [(6, 0, ids)]
+            rec.allowed_company_ids = [(6, 0, self._decode_company_ids(icp.get_param("postnl.allowed_company_ids", "[]")))]
 
     def _set_param(self, key, value):
         self.env["ir.config_parameter"].sudo().set_param(key, value or "")
@@ -1,63 +1,144 @@
 # -*- coding: utf-8 -*-
 import logging
+import time
 from odoo import api, models
 
+from ..utils.metrics import METRICS
+
 _logger = logging.getLogger(__name__)
 
 class PostNLFulfilmentCron(models.Model):
     _name = "postnl.fulfilment.cron"
     _description = "PostNL Fulfilment Cron Processor"
 
+    def _commit(self):
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
     @api.model
-    def run_process_shipment_queue(self, limit=20):
+    def run_process_shipment_queue(self, limit=None, chunk_size=None, time_budget=None):
+        """
+        Drain the queue until it is empty, `limit` jobs are done or the time
+        budget (postnl.queue_time_budget seconds) is spent; then re-trigger the
+        cron if work is left.
+
+        Jobs are claimed in chunks with FOR UPDATE SKIP LOCKED and committed
+        after each chunk, so several workers can drain the queue side by side
+        and a failing job never rolls back the ones already processed.
+        """
         Queue = self.env["postnl.fulfilment.shipment.queue"].sudo()
+        config = self.env["postnl.config"].get_snapshot()
+        chunk_size = chunk_size or config.queue_chunk_size
+        time_budget = config.queue_time_budget if time_budget is None else time_budget
+
+        started = time.monotonic()
+        processed = 0
+        budget_spent = False
+        follow_up = False
+        chunk_seconds = 0.0
+        while limit is None or processed < limit:
+            spent = time.monotonic() - started
+            if spent >= time_budget:
+                budget_spent = True
+                break
+            if not follow_up and spent + 2 * chunk_seconds >= time_budget:
+                # probably the last chunk: the next run is committed before it,
+                # so a worker killed at its time limit still leaves it behind
+                Queue._trigger_processing(force=True)
+                self._commit()
+                follow_up = True
+            size = chunk_size if limit is None else min(chunk_size, limit - processed)
+            jobs = Queue._claim_jobs(size)
+            if not jobs:
+                break
+            chunk_started = time.monotonic()
+            self._process_shipment_jobs(jobs)
+            processed += len(jobs)
+            # releases the row locks of this chunk
+            self._commit()
+            chunk_seconds = time.monotonic() - chunk_started
+            METRICS.observe("postnl_stage_seconds", chunk_seconds, endpoint="shipment", stage="chunk")
+            METRICS.inc("postnl_shipment_jobs_total", len(jobs))
+
+        elapsed = time.monotonic() - started
+        remaining, next_retry = Queue._backlog()
+        if remaining and (budget_spent or limit is not None):
+            if not follow_up:
+                Queue._trigger_processing(force=True)
+        elif next_retry:
+            Queue._trigger_processing(at=next_retry)
+
+        _logger.info(
+            "[PostNL] Shipment queue: %s jobs in %.1fs (%.1f jobs/s), %s due jobs left",
+            processed, elapsed, processed / elapsed if elapsed else 0.0, remaining,
+        )
+        return {
+            "processed": processed,
+            "seconds": elapsed,
+            "jobs_per_second": processed / elapsed if elapsed else 0.0,
+            "remaining": remaining,
+        }
+
+    def _process_shipment_jobs(self, jobs):
         SaleOrder = self.env["sale.order"].sudo()
+        config = self.env["postnl.config"].get_snapshot()
 
-        jobs = Queue.search([("state", "in", ("new", "failed"))], limit=limit, order="create_date asc")
+        # parse every job first so all orderNos of the chunk are matched in one query
+        parsed = {}
+        for job in jobs:
+            try:
+                parsed[job.id] = job._parse_payload()
+            except Exception as e:
+                parsed[job.id] = e
+
+        order_nos = set()
+        for payload in parsed.values():
+            if isinstance(payload, dict) and isinstance(payload.get("orderStatus"), list):
+                order_nos.update(
+                    os_item.get("orderNo") for os_item in payload["orderStatus"] if isinstance(os_item, dict)
+                )
+        orders_by_no = SaleOrder._postnl_match_orders(order_nos)
 
         for job in jobs:
+            job.attempts += 1
             try:
-                job.state = "processing"
-                job.attempts += 1
-
-                payload = job._parse_payload()
-
-                meta = {
-                    "merchantCode": payload.get("merchantCode"),
-                    "type": payload.get("type"),
-                    "messageNo": payload.get("messageNo"),
-                    "date": payload.get("date"),
-                    "time": payload.get("time"),
-                }
-                order_status_list = payload.get("orderStatus") or []
-                if not isinstance(order_status_list, list):
-                    raise ValueError("orderStatus is not a list")
-
-                updated = 0
-                for os_item in order_status_list:
-                    order_no = os_item.get("orderNo")
-                    if not order_no:
-                        continue
-
-                    # Matching strategy (adjust if needed)
-                    so = SaleOrder.search([
-                        "|", "|",
-                        ("postnl_fulfilment_order_no", "=", order_no),
-                        ("name", "=", order_no),
-                        ("client_order_ref", "=", order_no),
-                    ], limit=1)
-
-                    if not so:
-                        _logger.warning("No Sale Order found for orderNo=%s", order_no)
-                        continue
-
-                    so._postnl_apply_shipment(meta, os_item)
-                    updated += 1
-
-                job.state = "done"
-                job.last_error = False
+                # one savepoint per job: a failure only undoes this job's changes
+                with self.env.cr.savepoint():
+                    payload = parsed[job.id]
+                    if isinstance(payload, Exception):
+                        raise payload
+
+                    meta = {
+                        "merchantCode": payload.get("merchantCode"),
+                        "type": payload.get("type"),
+                        "messageNo": payload.get("messageNo"),
+                        "date": payload.get("date"),
+                        "time": payload.get("time"),
+                    }
+                    order_status_list = payload.get("orderStatus") or []
+                    if not isinstance(order_status_list, list):
+                        raise ValueError("orderStatus is not a list")
+
+                    updated = 0
+                    for os_item in order_status_list:
+                        order_no = os_item.get("orderNo")
+                        if not order_no:
+                            continue
+
+                        # Matching strategy: see sale.order._postnl_match_orders
+                        so = orders_by_no.get(order_no)
+
+                        if not so:
+                            _logger.warning("No Sale Order found for orderNo=%s", order_no)
+                            continue
+
+                        so._postnl_apply_shipment(meta, os_item)
+                        updated += 1
+
+                    job.state = "done"
+                    job.last_error = False
+                    job.next_attempt_at = False
 
             except Exception as e:
                 _logger.exception("Shipment queue processing failed: %s", e)
-                job.state = "failed"
-                job.last_error = str(e)
+                job._mark_failed(str(e), config)
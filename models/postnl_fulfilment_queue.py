@@ -1,10 +1,26 @@
 # -*- coding: utf-8 -*-
 import json
 import logging
-from odoo import api, fields, models
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+import psycopg2
+
+from ..utils.backoff import next_attempt_at
+from ..utils.compress import compress_bytes, decompress_text
+from ..utils.metrics import METRICS
+from ..utils.webhook import extract_meta, message_key
 
 _logger = logging.getLogger(__name__)
 
+# debounce of cron triggers during webhook bursts, per process and database:
+# {dbname: monotonic time} of the last immediate and the last postponed trigger
+_TRIGGER_DEBOUNCE = 1.0
+_last_trigger = {}
+_postponed_trigger = {}
+
 class PostNLFulfilmentShipmentQueue(models.Model):
     _name = "postnl.fulfilment.shipment.queue"
     _description = "PostNL Fulfilment Shipment Queue"
@@ -15,33 +31,165 @@ class PostNLFulfilmentShipmentQueue(models.Model):
         ("processing", "Processing"),
         ("done", "Done"),
         ("failed", "Failed"),
+        ("dead", "Dead"),
     ], default="new", required=True, index=True)
 
     attempts = fields.Integer(default=0)
     last_error = fields.Text()
+    # failed jobs are not claimed again before this moment (exponential backoff)
+    next_attempt_at = fields.Datetime()
 
-    payload = fields.Text(required=True)  # full JSON string
+    # full JSON body as received, zlib-compressed; payload decompresses on demand
+    payload_z = fields.Binary(attachment=False, required=True)
+    payload = fields.Text(compute="_compute_payload")
     message_no = fields.Char(index=True)
     merchant_code = fields.Char(index=True)
     event_date = fields.Char()
     event_time = fields.Char()
+    # merchantCode:messageNo (or body hash); PostNL retries are dropped on it
+    message_key = fields.Char(readonly=True)
+
+    _sql_constraints = [
+        ("message_key_uniq", "unique(message_key)", "This PostNL shipment message was already received."),
+    ]
+
+    def init(self):
+        # backs the claim query in _claim_jobs
+        tools.create_index(
+            self._cr,
+            "postnl_fulfilment_shipment_queue_state_create_date_idx",
+            self._table,
+            ["state", "create_date"],
+        )
+
+    @api.model
+    def _trigger_processing(self, at=None, force=False):
+        """
+        Ask the shipment cron to run now (or at `at`) instead of waiting for
+        its interval. Within _TRIGGER_DEBOUNCE of the last trigger the run is
+        postponed to the end of that window rather than dropped: a cron that
+        already claimed its jobs would not see this message. One postponed
+        trigger covers the whole window.
+        """
+        cron = self.env.ref("postnl_odoo_integration.ir_cron_postnl_process_shipment_queue", raise_if_not_found=False)
+        if not cron:
+            return
+        cron = cron.sudo()
+        if force or at is not None:
+            cron._trigger(at)
+            return
+
+        dbname = self.env.cr.dbname
+        now = time.monotonic()
+        last = _last_trigger.get(dbname)
+        if last is None or now - last >= _TRIGGER_DEBOUNCE:
+            cron._trigger()
+            _last_trigger[dbname] = now
+            return
+
+        window_end = last + _TRIGGER_DEBOUNCE
+        if _postponed_trigger.get(dbname, 0.0) >= window_end:
+            return
+        cron._trigger(fields.Datetime.now() + timedelta(seconds=window_end - now))
+        _postponed_trigger[dbname] = window_end
+
+    @api.model
+    def _backlog(self):
+        """(due jobs, earliest next_attempt_at of jobs waiting on backoff)"""
+        self.env.flush_all()
+        self.env.cr.execute(
+            """
+            SELECT count(*) FILTER (WHERE next_attempt_at IS NULL OR next_attempt_at <= (now() at time zone 'UTC')),
+                   min(next_attempt_at) FILTER (WHERE next_attempt_at > (now() at time zone 'UTC'))
+              FROM postnl_fulfilment_shipment_queue
+             WHERE state IN ('new', 'failed')
+            """
+        )
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _claim_jobs(self, limit):
+        """Lock up to `limit` due jobs; rows locked by another worker are skipped."""
+        self.env.flush_all()
+        self.env.cr.execute(
+            """
+            SELECT id
+              FROM postnl_fulfilment_shipment_queue
+             WHERE state IN ('new', 'failed')
+               AND (next_attempt_at IS NULL OR next_attempt_at <= (now() at time zone 'UTC'))
+             ORDER BY create_date
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+            """,
+            (limit,),
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _mark_failed(self, error, config):
+        """Schedule a retry with exponential backoff, or dead-letter after the last attempt."""
+        for job in self:
+            if job.attempts >= config.queue_max_attempts:
+                _logger.error("[PostNL] Shipment job %s is dead after %s attempts: %s", job.id, job.attempts, error)
+                METRICS.inc("postnl_queue_dead_total", queue="shipment")
+                job.write({"state": "dead", "last_error": error, "next_attempt_at": False})
+            else:
+                METRICS.inc("postnl_queue_retries_total", queue="shipment")
+                job.write({
+                    "state": "failed",
+                    "last_error": error,
+                    "next_attempt_at": next_attempt_at(
+                        fields.Datetime.now(), job.attempts, config.queue_backoff_seconds
+                    ),
+                })
+
+    def _compute_payload(self):
+        # bin_size=True (web client) would hand us the size, not the bytes
+        for job, raw in zip(self, self.with_context(bin_size=False)):
+            job.payload = decompress_text(raw.payload_z)
 
     def _parse_payload(self):
         self.ensure_one()
-        return json.loads(self.payload or "{}")
+        return json.loads(decompress_text(self.payload_z) or "{}")
+
+    @api.model
+    def ingest_raw(self, raw: bytes):
+        """
+        Webhook fast path: store the body as received and only read the
+        top-level metadata columns, with a single INSERT (no json.dumps, no
+        ORM create). Returns the new job id, or None when the message was
+        already queued (PostNL retry).
+        """
+        meta = extract_meta(raw)
+        self.env.cr.execute(
+            """
+            INSERT INTO postnl_fulfilment_shipment_queue
+                   (payload_z, message_no, merchant_code, event_date, event_time, message_key,
+                    state, attempts, create_uid, write_uid, create_date, write_date)
+            VALUES (%s, %s, %s, %s, %s, %s, 'new', 0, %s, %s,
+                    (now() at time zone 'UTC'), (now() at time zone 'UTC'))
+            ON CONFLICT (message_key) DO NOTHING
+            RETURNING id
+            """,
+            (
+                # fast level: this runs inside the webhook request
+                psycopg2.Binary(compress_bytes(raw, level=1)),
+                meta["messageNo"],
+                meta["merchantCode"],
+                meta["date"],
+                meta["time"],
+                message_key(meta, raw),
+                self.env.uid,
+                self.env.uid,
+            ),
+        )
+        row = self.env.cr.fetchone()
+        if not row:
+            _logger.info("[PostNL] Duplicate shipment message %s ignored", meta["messageNo"])
+            return None
+        return row[0]
 
     @api.model
     def create_from_webhook(self, payload_dict: dict):
-        meta = {
-            "merchantCode": payload_dict.get("merchantCode"),
-            "messageNo": payload_dict.get("messageNo"),
-            "date": payload_dict.get("date"),
-            "time": payload_dict.get("time"),
-        }
-        return self.create({
-            "payload": json.dumps(payload_dict),
-            "merchant_code": meta["merchantCode"],
-            "message_no": meta["messageNo"],
-            "event_date": meta["date"],
-            "event_time": meta["time"],
-        })
+        """Queue an already decoded message; duplicates return an empty recordset."""
+        job_id = self.ingest_raw(json.dumps(payload_dict).encode("utf-8"))
+        return self.browse(job_id) if job_id else self.browse()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, fields, models
+
+from ..utils.metrics import METRICS, MetricsRegistry
+
+_logger = logging.getLogger(__name__)
+
+
+class PostNLMetric(models.Model):
+    """Counter and histogram totals of every worker process.
+
+    Sends run in cron workers, which never answer /postnl/metrics, and a
+    scrape lands on any HTTP worker: each process adds what it recorded to
+    these rows (after every cron job and on every scrape), and the endpoint
+    renders the sums.
+    """
+
+    _name = "postnl.metric"
+    _description = "PostNL Metric"
+    _log_access = False
+
+    name = fields.Char(required=True, readonly=True)
+    # JSON list of [label, value] pairs, sorted
+    labels = fields.Char(required=True, readonly=True)
+    # "" for a counter; a bucket bound, "sum" or "count" for a histogram
+    field = fields.Char(readonly=True)
+    value = fields.Float(readonly=True)
+
+    _sql_constraints = [
+        ("metric_uniq", "unique(name, labels, field)", "This metric sample already exists."),
+    ]
+
+    @api.model
+    def _flush_process_metrics(self):
+        """Add the values this process recorded since the last flush, in a transaction of its own."""
+        counters, histograms = METRICS.drain()
+        if not counters and not histograms:
+            return
+        rows = METRICS.to_rows(counters, histograms)
+        try:
+            with self.env.registry.cursor() as cr:
+                # rows are sorted, so concurrent flushes lock them in the same order
+                cr.execute(
+                    """
+                    INSERT INTO postnl_metric (name, labels, field, value)
+                    SELECT * FROM unnest(%s::varchar[], %s::varchar[], %s::varchar[], %s::float8[])
+                    ON CONFLICT (name, labels, field) DO UPDATE SET value = postnl_metric.value + excluded.value
+                    """,
+                    [list(column) for column in zip(*rows)],
+                )
+        except Exception as e:
+            # keep them for the next flush
+            METRICS.merge(counters, histograms)
+            _logger.warning("[PostNL] Could not store %s metric samples: %s", len(rows), e)
+
+    @api.model
+    def _render(self, gauges=()):
+        """Prometheus text of the totals of every process, plus the given gauges."""
+        self._flush_process_metrics()
+        self.env.cr.execute("SELECT name, labels, coalesce(field, ''), value FROM postnl_metric")
+        registry = MetricsRegistry.from_rows(self.env.cr.fetchall(), METRICS.buckets, METRICS.help_texts())
+        return registry.render(gauges)
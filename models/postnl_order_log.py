@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from odoo import fields, models
+from odoo import fields, models, tools
+
+from ..utils.compress import compress_text, decompress_text
 
 
 class PostNLOrderLog(models.Model):
@@ -21,64 +23,65 @@ class PostNLOrderLog(models.Model):
     success = fields.Boolean(string='Success', default=False, index=True)
     error_message = fields.Char(string='Error')
 
-    request_payload = fields.Text(string='Request Payload')
-    response_body = fields.Text(string='Response Body')
+    # stored zlib-compressed; the Text fields decompress on demand (form view / export)
+    request_payload_z = fields.Binary(string='Request Payload (compressed)', attachment=False)
+    response_body_z = fields.Binary(string='Response Body (compressed)', attachment=False)
+    request_payload = fields.Text(string='Request Payload', compute='_compute_payloads', inverse='_inverse_request_payload')
+    response_body = fields.Text(string='Response Body', compute='_compute_payloads', inverse='_inverse_response_body')
     sent_at = fields.Datetime(string='Sent At', default=fields.Datetime.now, index=True)
 
+    # per-stage durations of this attempt (JSON {stage: ms}); batch stages
+    # are shared evenly between the orders of the batch, http is per order
+    stage_timings = fields.Text(string='Stage Timings (ms)', readonly=True)
+    duration_ms = fields.Float(string='Duration (ms)', readonly=True)
+
     # -------------------------------------------------------------------------
-    # Fulfilment / Shipment details (Related from Sale Order)
+    # Fulfilment / Shipment details (snapshot of the Sale Order)
+    # Stored on the log so list/search views stay single-table queries; kept
+    # up to date by sale.order._postnl_apply_shipment.
     # -------------------------------------------------------------------------
-    so_postnl_fulfilment_status = fields.Selection(
-        related='sale_order_id.postnl_fulfilment_status',
-        string='Fulfilment Status',
-        store=False,
-        readonly=True,
-    )
-    so_postnl_fulfilment_order_no = fields.Char(
-        related='sale_order_id.postnl_fulfilment_order_no',
-        string='Fulfilment Order No',
-        store=False,
-        readonly=True,
-    )
-    so_postnl_message_no = fields.Char(
-        related='sale_order_id.postnl_message_no',
-        string='Shipment Message No',
-        store=False,
-        readonly=True,
-    )
-    so_postnl_ship_date = fields.Date(
-        related='sale_order_id.postnl_ship_date',
-        string='Ship Date',
-        store=False,
-        readonly=True,
-    )
-    so_postnl_ship_time = fields.Char(
-        related='sale_order_id.postnl_ship_time',
-        string='Ship Time',
-        store=False,
-        readonly=True,
-    )
-    so_postnl_track_trace_code = fields.Char(
-        related='sale_order_id.postnl_track_trace_code',
-        string='Barcode / Track&Trace',
-        store=False,
-        readonly=True,
-    )
-    so_postnl_track_trace_url = fields.Char(
-        related='sale_order_id.postnl_track_trace_url',
-        string='Track&Trace URL',
-        store=False,
-        readonly=True,
-    )
-    so_postnl_last_webhook_at = fields.Datetime(
-        related='sale_order_id.postnl_last_webhook_at',
-        string='Last Webhook At',
-        store=False,
-        readonly=True,
-    )
+    so_postnl_fulfilment_status = fields.Selection([
+        ("pending", "Pending"),
+        ("shipped", "Shipped"),
+        ("partial", "Partially Shipped"),
+        ("error", "Error"),
+    ], string='Fulfilment Status', readonly=True, index=True)
+    so_postnl_fulfilment_order_no = fields.Char(string='Fulfilment Order No', readonly=True, index=True)
+    so_postnl_message_no = fields.Char(string='Shipment Message No', readonly=True)
+    so_postnl_ship_date = fields.Date(string='Ship Date', readonly=True)
+    so_postnl_ship_time = fields.Char(string='Ship Time', readonly=True)
+    so_postnl_track_trace_code = fields.Char(string='Barcode / Track&Trace', readonly=True, index=True)
+    so_postnl_track_trace_url = fields.Char(string='Track&Trace URL', readonly=True)
+    so_postnl_last_webhook_at = fields.Datetime(string='Last Webhook At', readonly=True)
+
+    # large debug payload: only shown on the form, read from the Sale Order
     so_postnl_last_payload = fields.Text(
         related='sale_order_id.postnl_last_payload',
         string='Last Shipment Payload',
         store=False,
         readonly=True,
     )
+
+    def init(self):
+        # latest attempt per order (DISTINCT ON in postnl.resend.wizard)
+        tools.create_index(
+            self._cr,
+            "postnl_order_log_sale_order_sent_at_idx",
+            self._table,
+            ["sale_order_id", "sent_at DESC", "id DESC"],
+        )
+
+    def _compute_payloads(self):
+        # the web client reads with bin_size=True, which turns the *_z
+        # columns into sizes ("1.2 kB"); decompress the real bytes
+        for rec, raw in zip(self, self.with_context(bin_size=False)):
+            rec.request_payload = decompress_text(raw.request_payload_z)
+            rec.response_body = decompress_text(raw.response_body_z)
+
+    def _inverse_request_payload(self):
+        for rec in self:
+            rec.request_payload_z = compress_text(rec.request_payload)
+
+    def _inverse_response_body(self):
+        for rec in self:
+            rec.response_body_z = compress_text(rec.response_body)
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+from ..services.postnl_client import PostNLClient
+from ..services.postnl_http import breaker_retry_in, breaker_stats, get_transport, limiter_stats
+from ..utils.metrics import METRICS
+
+_logger = logging.getLogger(__name__)
+
+# a job still in processing after this long belongs to a worker that died
+STALE_PROCESSING = timedelta(hours=1)
+
+# only orders still in these states are sent; a job can wait for hours
+# (retries, scheduled resends) and the order may be cancelled meanwhile
+SENDABLE_ORDER_STATES = ("sale", "done")
+
+
+class PostNLOutboundQueue(models.Model):
+    """Outbox of sale orders waiting to be sent to PostNL.
+
+    Confirming an order only enqueues a row here; the HTTP call happens later
+    in the cron, after the confirm transaction has been committed.
+    """
+
+    _name = "postnl.outbound.queue"
+    _description = "PostNL Outbound Order Queue"
+    _order = "create_date asc, id asc"
+
+    sale_order_id = fields.Many2one("sale.order", string="Sale Order", required=True, ondelete="cascade", index=True)
+    order_name = fields.Char(string="Order")
+
+    state = fields.Selection([
+        ("new", "New"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+        ("dead", "Dead"),
+        ("cancelled", "Cancelled"),
+    ], default="new", required=True, index=True)
+
+    attempts = fields.Integer(default=0)
+    last_error = fields.Text()
+    sent_at = fields.Datetime(string="Sent At")
+    # not sent before this moment (bulk resends are spread out at their rate)
+    scheduled_at = fields.Datetime(string="Scheduled At")
+    # parallel calls for the batch this job is sent in (0 = postnl.send_concurrency)
+    concurrency = fields.Integer(default=0)
+
+    log_id = fields.Many2one("postnl.order.log", string="Last Log", ondelete="set null")
+
+    @api.model
+    def enqueue_orders(self, orders):
+        """Queue orders for sending, skipping those already waiting in the queue."""
+        if not orders:
+            return self.browse()
+
+        pending = self.search([
+            ("sale_order_id", "in", orders.ids),
+            ("state", "in", ("new", "processing", "failed")),
+        ])
+        pending_ids = set(pending.mapped("sale_order_id").ids)
+
+        jobs = self.create([
+            {"sale_order_id": order.id, "order_name": order.name}
+            for order in orders
+            if order.id not in pending_ids
+        ])
+        if jobs:
+            # fires once the confirm transaction has been committed
+            self._trigger_send()
+        return jobs
+
+    @api.model
+    def requeue_orders(self, orders, scheduled_at=None, concurrency=0):
+        """
+        Queue orders for another send. An order keeps a single pending job:
+        its new / failed job is reset (attempts included) rather than a second
+        one created, so the cron never sends it twice. Orders whose job is
+        being sent right now are left out. Returns the queued jobs.
+        """
+        if not orders:
+            return self.browse()
+
+        pending = self.search([
+            ("sale_order_id", "in", orders.ids),
+            ("state", "in", ("new", "processing", "failed")),
+        ])
+        reset = pending.filtered(lambda job: job.state != "processing")
+        vals = {"scheduled_at": scheduled_at or False, "concurrency": concurrency or 0}
+        reset.write({"state": "new", "attempts": 0, "last_error": False, **vals})
+
+        pending_ids = set(pending.mapped("sale_order_id").ids)
+        created = self.create([
+            {"sale_order_id": order.id, "order_name": order.name, **vals}
+            for order in orders
+            if order.id not in pending_ids
+        ])
+        jobs = reset | created
+        if jobs:
+            self._trigger_send(at=scheduled_at)
+        return jobs
+
+    def action_send_again(self):
+        """Form button: queue the orders of failed / dead jobs once more."""
+        self.check_access("write")
+        self.env["postnl.outbound.queue"].sudo().requeue_orders(
+            self.filtered(lambda job: job.state in ("failed", "dead")).mapped("sale_order_id")
+        )
+        return True
+
+    @api.model
+    def _trigger_send(self, at=None):
+        cron = self.env.ref("postnl_odoo_integration.ir_cron_postnl_process_outbound_queue", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    def _commit(self):
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    @api.model
+    def _claim_due(self, limit, max_attempts):
+        """
+        New and failed jobs with attempts left whose scheduled moment has
+        come, plus jobs still marked processing long after their batch
+        started (the worker died while the requests were in flight).
+        """
+        now = fields.Datetime.now()
+        return self.sudo().search([
+            ("attempts", "<", max_attempts),
+            "|", ("scheduled_at", "=", False), ("scheduled_at", "<=", now),
+            "|",
+            ("state", "in", ("new", "failed")),
+            "&", ("state", "=", "processing"), ("write_date", "<", now - STALE_PROCESSING),
+        ], limit=limit)
+
+    @api.model
+    def _backlog(self):
+        """(new jobs due now, earliest scheduled_at still to come)"""
+        self.env.flush_all()
+        self.env.cr.execute(
+            """
+            SELECT count(*) FILTER (WHERE scheduled_at IS NULL OR scheduled_at <= (now() at time zone 'UTC')),
+                   min(scheduled_at) FILTER (WHERE scheduled_at > (now() at time zone 'UTC'))
+              FROM postnl_outbound_queue
+             WHERE state = 'new'
+            """
+        )
+        return self.env.cr.fetchone()
+
+    def _cancel_unconfirmed(self):
+        """Close the jobs whose order is no longer confirmed; returns the jobs left to send."""
+        unconfirmed = self.filtered(lambda job: job.sale_order_id.state not in SENDABLE_ORDER_STATES)
+        for job in unconfirmed:
+            _logger.info(
+                "[PostNL] Not sending %s: order is %s, no longer confirmed", job.order_name, job.sale_order_id.state
+            )
+            job.write({
+                "state": "cancelled",
+                "last_error": f"Not sent: order is {job.sale_order_id.state}, no longer confirmed",
+            })
+        unconfirmed.mapped("sale_order_id").write({"postnl_last_result": "cancelled"})
+        return self - unconfirmed
+
+    def _fail_batch(self, error, max_attempts):
+        """The whole batch failed before anything was sent."""
+        now = fields.Datetime.now()
+        for job in self:
+            METRICS.inc("postnl_requests_total", endpoint="order", outcome="exception")
+            dead = job.attempts >= max_attempts
+            METRICS.inc("postnl_queue_dead_total" if dead else "postnl_queue_retries_total", queue="outbound")
+            job.write({"state": "dead" if dead else "failed", "last_error": str(error)})
+        self.mapped("sale_order_id").write({
+            "postnl_last_send": now,
+            "postnl_last_result": f"exception: {str(error)}",
+        })
+        self.env["ir.logging"].sudo().create({
+            "name": "PostNL Outbound Queue",
+            "type": "server",
+            "level": "ERROR",
+            "message": f"Unexpected exception sending {', '.join(self.mapped('order_name'))}: {str(error)}",
+            "path": "postnl_fulfilment_integration",
+            "func": "run_process_outbound_queue",
+            "line": 0,
+        })
+
+    @api.model
+    def run_process_outbound_queue(self, limit=50):
+        config = self.env["postnl.config"].get_snapshot()
+        max_attempts = config.outbound_max_attempts
+
+        # PostNL known to be down: leave the queue alone until the breaker lets a probe through
+        retry_in = breaker_retry_in(config.api_url, config.breaker)
+        if retry_in:
+            _logger.info("[PostNL] Outbound queue paused, circuit open (retry in %.0fs)", retry_in)
+            self._trigger_send(at=fields.Datetime.now() + timedelta(seconds=retry_in))
+            return True
+
+        claimed = self._claim_due(limit, max_attempts)
+        jobs = claimed._cancel_unconfirmed()
+        if not jobs:
+            if claimed:
+                self._commit()
+            return True
+
+        for job in jobs:
+            job.write({"state": "processing", "attempts": job.attempts + 1})
+
+        # payloads, orderNumbers and pending logs: nothing is sent yet, so a
+        # failure here rolls back cleanly and the batch is simply retried
+        client = PostNLClient(self.env)
+        try:
+            with self.env.cr.savepoint():
+                batch = client.prepare_batch(jobs.mapped("sale_order_id"))
+        except Exception as e:
+            _logger.exception("[PostNL] Outbound queue batch failed: %s", e)
+            jobs._fail_batch(e, max_attempts)
+            self._commit()
+            return True
+
+        # claim + pending logs are committed and the sale order row locks
+        # released before the first request goes out
+        self._commit()
+
+        # HTTP calls on the client thread pool; results are recorded outside
+        # any savepoint, so an accepted order is never marked failed
+        if batch.jobs:
+            concurrency = max(jobs.mapped("concurrency")) or None
+            results = client.record_batch(batch, client.dispatch_batch(batch, concurrency))
+        else:
+            results = batch.results
+
+        now = fields.Datetime.now()
+        for job in jobs:
+            order = job.sale_order_id
+            if order.id in client.short_circuited:
+                # refused by the open breaker: not an attempt, send again once it closes
+                job.write({
+                    "state": "new",
+                    "attempts": job.attempts - 1,
+                    "last_error": client.errors.get(order.id) or "PostNL unavailable (circuit open)",
+                })
+                continue
+            ok = results.get(order.id, False)
+            dead = not ok and job.attempts >= max_attempts
+            if not ok:
+                METRICS.inc("postnl_queue_dead_total" if dead else "postnl_queue_retries_total", queue="outbound")
+            log = client.logs.get(order.id)
+            job.write({
+                "state": "done" if ok else ("dead" if dead else "failed"),
+                "sent_at": now,
+                "log_id": log.id if log else False,
+                "last_error": False if ok else (client.errors.get(order.id) or (log.error_message if log else "Send failed")),
+            })
+            order.write({
+                "postnl_last_send": now,
+                "postnl_last_result": "success" if ok else "error",
+            })
+
+        if client.short_circuited:
+            retry_in = breaker_retry_in(config.api_url, config.breaker) or config.breaker.reset_seconds
+            self._trigger_send(at=fields.Datetime.now() + timedelta(seconds=retry_in))
+        else:
+            # more new work right away, or the next scheduled resend slot;
+            # failed jobs wait for the regular interval
+            due, next_slot = self._backlog()
+            if due and len(claimed) >= limit:
+                self._trigger_send()
+            elif next_slot:
+                self._trigger_send(at=next_slot)
+
+        self._commit()
+
+        _logger.info(
+            "[PostNL] Outbound queue: %s jobs, transport %s, limiters %s, breakers %s",
+            len(jobs), get_transport(config.http_pool_size).stats(), limiter_stats(), breaker_stats(),
+        )
+        return True
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class PostNLRateBucket(models.Model):
+    """Token bucket of one PostNL endpoint, shared by every worker process.
+
+    Only written by the raw SQL of services/postnl_http.py (a single atomic
+    upsert per lease, in its own short transaction); the rows are visible
+    here for troubleshooting.
+    """
+
+    _name = "postnl.rate.bucket"
+    _description = "PostNL Rate Limit Bucket"
+    _rec_name = "endpoint"
+
+    endpoint = fields.Char(required=True, readonly=True)
+    # may go negative: tokens already promised to waiting callers
+    tokens = fields.Float(readonly=True)
+    # tokens are accounted up to this moment; in the future while paused
+    updated_at = fields.Datetime(readonly=True)
+
+    _sql_constraints = [
+        ("endpoint_uniq", "unique(endpoint)", "There is already a rate limit bucket for this endpoint."),
+    ]
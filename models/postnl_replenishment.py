@@ -1,6 +1,14 @@
 # -*- coding: utf-8 -*-
 import logging
-from odoo import models, fields
+from datetime import timedelta
+
+from odoo import api, models, fields, tools
+
+from ..services.postnl_http import breaker_retry_in
+from ..utils.backoff import next_attempt_at
+from ..utils.circuit import CircuitOpenError
+from ..utils.metrics import METRICS
+from ..utils.compress import compress_text, decompress_text
 
 _logger = logging.getLogger(__name__)
 
@@ -13,10 +21,10 @@ class PostNLReplenishment(models.Model):
     name = fields.Char(string="Replenishment Number", required=True)
 
     # NEW: link to PO (so PO confirm can create replenishment)
-    purchase_order_id = fields.Many2one("purchase.order", string="Purchase Order", ondelete="cascade")
+    purchase_order_id = fields.Many2one("purchase.order", string="Purchase Order", ondelete="cascade", index=True)
 
     # OPTIONAL: link to receipt if you want later
-    picking_id = fields.Many2one("stock.picking", string="Incoming Receipt", ondelete="cascade")
+    picking_id = fields.Many2one("stock.picking", string="Incoming Receipt", ondelete="cascade", index=True)
 
     merchant_code = fields.Char(required=True)
     fulfilment_location = fields.Char(required=True)
@@ -25,7 +33,150 @@ class PostNLReplenishment(models.Model):
         ("draft", "Draft"),
         ("sent", "Sent"),
         ("error", "Error"),
-    ], default="draft")
+        ("dead", "Dead"),
+    ], default="draft", index=True)
+
+    # per-stage durations of the last send (JSON {stage: ms})
+    stage_timings = fields.Text(readonly=True)
+    duration_ms = fields.Float(string="Duration (ms)", readonly=True)
+
+    # drafts are sent by the dispatch cron; errors are retried with backoff
+    attempts = fields.Integer(default=0, readonly=True)
+    next_attempt_at = fields.Datetime(readonly=True)
+
+    # large POs go out as several numbered requests (name-1, name-2, ...)
+    parts_total = fields.Integer(string="Parts", default=0, readonly=True)
+    parts_sent = fields.Integer(string="Parts Sent", default=0, readonly=True)
 
-    request_payload = fields.Text()
+    # stored zlib-compressed; request_payload decompresses on demand (form view / export)
+    request_payload_z = fields.Binary(attachment=False)
+    request_payload = fields.Text(compute="_compute_request_payload", inverse="_inverse_request_payload")
     response_message = fields.Text()
+
+    def _compute_request_payload(self):
+        # bin_size=True (web client) would hand us the size, not the bytes
+        for rec, raw in zip(self, self.with_context(bin_size=False)):
+            rec.request_payload = decompress_text(raw.request_payload_z)
+
+    def _inverse_request_payload(self):
+        for rec in self:
+            rec.request_payload_z = compress_text(rec.request_payload)
+
+    def init(self):
+        # backs the claim query in _claim_due
+        tools.create_index(
+            self._cr,
+            "postnl_replenishment_state_create_date_idx",
+            self._table,
+            ["state", "create_date"],
+        )
+
+    def _commit(self):
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    @api.model
+    def _trigger_dispatch(self, at=None):
+        """Run the dispatch cron after the current transaction (or at `at`)."""
+        cron = self.env.ref("postnl_odoo_integration.ir_cron_postnl_dispatch_replenishments", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    @api.model
+    def _claim_due(self, limit):
+        """Lock up to `limit` due drafts / errors; rows locked by another worker are skipped."""
+        self.env.flush_all()
+        self.env.cr.execute(
+            """
+            SELECT id
+              FROM postnl_replenishment
+             WHERE state IN ('draft', 'error')
+               AND (next_attempt_at IS NULL OR next_attempt_at <= (now() at time zone 'UTC'))
+             ORDER BY create_date
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+            """,
+            (limit,),
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _mark_failed(self, error, config):
+        """Schedule a retry with exponential backoff, or dead-letter after the last attempt."""
+        for rec in self:
+            if rec.attempts >= config.queue_max_attempts:
+                _logger.error("[PostNL Repl] %s is dead after %s attempts: %s", rec.name, rec.attempts, error)
+                METRICS.inc("postnl_queue_dead_total", queue="replenishment")
+                rec.write({"state": "dead", "response_message": error, "next_attempt_at": False})
+            else:
+                METRICS.inc("postnl_queue_retries_total", queue="replenishment")
+                rec.write({
+                    "state": "error",
+                    "response_message": error,
+                    "next_attempt_at": next_attempt_at(
+                        fields.Datetime.now(), rec.attempts, config.queue_backoff_seconds
+                    ),
+                })
+
+    @api.model
+    def run_dispatch_replenishments(self, limit=50):
+        """
+        Send queued replenishments. Each one is committed on its own, so the
+        parts it already delivered are never sent twice after a later crash.
+        """
+        config = self.env["postnl.config"].get_snapshot()
+        service = self.env["postnl.replenishment.service"]
+
+        # PostNL known to be down: wait until the breaker lets a probe through
+        retry_in = breaker_retry_in(config.inbound_url, config.breaker)
+        if retry_in:
+            _logger.info("[PostNL Repl] Dispatch paused, circuit open (retry in %.0fs)", retry_in)
+            self._trigger_dispatch(at=fields.Datetime.now() + timedelta(seconds=retry_in))
+            return True
+
+        recs = self.sudo()._claim_due(limit)
+        sent = 0
+        for rec in recs:
+            rec.attempts += 1
+            deferred = None
+            try:
+                with self.env.cr.savepoint():
+                    try:
+                        ok = service.send_replenishment(rec)
+                    except CircuitOpenError as e:
+                        deferred = e
+                if deferred:
+                    # refused without a request: not an attempt, stop until the breaker closes
+                    rec.write({
+                        "attempts": rec.attempts - 1,
+                        "next_attempt_at": fields.Datetime.now() + timedelta(seconds=deferred.retry_in),
+                    })
+                    _logger.info("[PostNL Repl] %s deferred: %s", rec.name, deferred)
+                elif ok:
+                    rec.next_attempt_at = False
+                    sent += 1
+                else:
+                    rec._mark_failed(rec.response_message or "Send failed", config)
+            except Exception as e:
+                _logger.exception("[PostNL Repl] Dispatch failed for %s: %s", rec.name, e)
+                rec._mark_failed(str(e), config)
+            self._commit()
+            if deferred:
+                break
+
+        # more due work, or the earliest retry
+        self.env.cr.execute(
+            """
+            SELECT bool_or(next_attempt_at IS NULL OR next_attempt_at <= (now() at time zone 'UTC')),
+                   min(next_attempt_at) FILTER (WHERE next_attempt_at > (now() at time zone 'UTC'))
+              FROM postnl_replenishment
+             WHERE state IN ('draft', 'error')
+            """
+        )
+        due, next_retry = self.env.cr.fetchone()
+        if due and len(recs) >= limit:
+            self._trigger_dispatch()
+        elif next_retry:
+            self._trigger_dispatch(at=next_retry)
+
+        _logger.info("[PostNL Repl] Dispatched %s/%s replenishments", sent, len(recs))
+        return True
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+
+from ..services.postnl_client import PostNLClient
+
+_logger = logging.getLogger(__name__)
+
+
+class PostNLResendWizard(models.TransientModel):
+    """Re-send every order whose latest PostNL attempt failed (e.g. after an outage).
+
+    Candidates come from one SQL query and are queued on postnl.outbound.queue
+    chunk by chunk; the outbound cron sends them, so an order is never sent
+    both by the wizard and by the cron. Each chunk gets its own start time so
+    the queue drains at the requested rate, and the ORM cache is cleared after
+    every chunk so memory stays flat however many orders are selected.
+    """
+
+    _name = "postnl.resend.wizard"
+    _description = "PostNL Bulk Resend"
+
+    date_from = fields.Datetime(
+        string="Failed From", required=True,
+        default=lambda self: fields.Datetime.now() - timedelta(days=1),
+    )
+    date_to = fields.Datetime(string="Failed Until", required=True, default=fields.Datetime.now)
+    sale_order_ids = fields.Many2many(
+        "sale.order", string="Only These Orders",
+        help="Leave empty to consider every order.",
+    )
+
+    chunk_size = fields.Integer(default=200, required=True)
+    rate = fields.Float(string="Orders per Second", default=5.0, help="0 = no limit.")
+    concurrency = fields.Integer(
+        default=lambda self: self.env["postnl.config"].get_snapshot().send_concurrency,
+        help="Parallel HTTP calls the outbound cron uses for these orders (capped by the HTTP pool size).",
+    )
+    dry_run = fields.Boolean(string="Dry Run", help="Only build the payloads, nothing is queued.")
+
+    candidate_count = fields.Integer(readonly=True)
+    result_message = fields.Text(readonly=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get("active_model") == "sale.order" and self.env.context.get("active_ids"):
+            res["sale_order_ids"] = [(6, 0, self.env.context["active_ids"])]
+        return res
+
+    def _candidate_ids(self):
+        """
+        Ids of confirmed orders of allowed companies whose latest log is a
+        failure sent within the date range, or whose latest outbound job went
+        dead in it (used up its attempts before any log was written: config,
+        build or orderNumber errors). Orders PostNL accepted once are left out.
+        """
+        self.ensure_one()
+        config = self.env["postnl.config"].get_snapshot()
+        if not config.config_id or not config.allowed_company_ids:
+            return []
+        self.env.flush_all()
+        query = """
+            WITH failed AS (
+                SELECT latest.sale_order_id
+                  FROM (
+                        SELECT DISTINCT ON (sale_order_id) sale_order_id, success, sent_at
+                          FROM postnl_order_log
+                         WHERE sale_order_id IS NOT NULL
+                         ORDER BY sale_order_id, sent_at DESC, id DESC
+                       ) latest
+                 WHERE latest.success IS NOT TRUE
+                   AND latest.sent_at >= %(date_from)s
+                   AND latest.sent_at <= %(date_to)s
+                UNION
+                SELECT job.sale_order_id
+                  FROM postnl_outbound_queue job
+                 WHERE job.state = 'dead'
+                   AND job.write_date >= %(date_from)s
+                   AND job.write_date <= %(date_to)s
+                   AND NOT EXISTS (
+                        SELECT 1 FROM postnl_outbound_queue newer
+                         WHERE newer.sale_order_id = job.sale_order_id AND newer.id > job.id
+                   )
+            )
+            SELECT so.id
+              FROM failed
+              JOIN sale_order so ON so.id = failed.sale_order_id
+             WHERE so.company_id = ANY(%(company_ids)s)
+               AND so.state IN ('sale', 'done')
+               -- accepted by PostNL once already (its success log may have been reclaimed)
+               AND so.postnl_last_result IS DISTINCT FROM 'success'
+               AND NOT EXISTS (
+                    SELECT 1 FROM postnl_order_log ok WHERE ok.sale_order_id = so.id AND ok.success IS TRUE
+               )
+        """
+        params = {
+            "date_from": self.date_from,
+            "date_to": self.date_to,
+            "company_ids": list(config.allowed_company_ids),
+        }
+        if self.sale_order_ids:
+            query += " AND so.id = ANY(%(order_ids)s)"
+            params["order_ids"] = self.sale_order_ids.ids
+        query += " ORDER BY so.id"
+        self.env.cr.execute(query, params)
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def action_count(self):
+        self.ensure_one()
+        self.candidate_count = len(self._candidate_ids())
+        return self._reopen()
+
+    def action_run(self):
+        self.ensure_one()
+        if self.date_from > self.date_to:
+            raise UserError("The start date must be before the end date.")
+        stats = self._run(
+            self._candidate_ids(),
+            chunk_size=self.chunk_size,
+            rate=self.rate,
+            concurrency=self.concurrency,
+            dry_run=self.dry_run,
+        )
+        if stats["mode"] == "Dry run":
+            message = "Dry run: %(candidates)s orders built, %(ok)s ok, %(failed)s failed" % stats
+        else:
+            message = "Resend: %(ok)s of %(candidates)s orders queued, %(failed)s already being sent" % stats
+            if stats["until"]:
+                message += ", spread until %s" % fields.Datetime.to_string(stats["until"])
+        self.write({"candidate_count": stats["candidates"], "result_message": message})
+        return self._reopen()
+
+    def _reopen(self):
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    @api.model
+    def _run(self, order_ids, chunk_size=200, rate=0.0, concurrency=None, dry_run=False):
+        """
+        Queue the given orders on the outbound queue chunk by chunk, chunk n
+        scheduled n * chunk_size / rate seconds from now and sent with
+        `concurrency` parallel calls. With dry_run, only build every payload
+        through the normal PostNLClient. Only the id list is kept across chunks.
+        """
+        chunk_size = max(int(chunk_size or 1), 1)
+        Queue = self.env["postnl.outbound.queue"].sudo()
+        now = fields.Datetime.now()
+        ok = failed = 0
+        until = None
+
+        for start in range(0, len(order_ids), chunk_size):
+            orders = self.env["sale.order"].sudo().browse(order_ids[start:start + chunk_size])
+
+            if dry_run:
+                built = PostNLClient(self.env)._build_payloads(orders)
+                failed_ids = [oid for oid, res in built.items() if isinstance(res, Exception)]
+                for oid in failed_ids:
+                    _logger.warning("[PostNL Resend] Dry run: order %s does not build: %s", oid, built[oid])
+                ok += len(orders) - len(failed_ids)
+                failed += len(failed_ids)
+            else:
+                at = now + timedelta(seconds=start / rate) if rate and rate > 0 else None
+                jobs = Queue.requeue_orders(orders, scheduled_at=at, concurrency=concurrency)
+                jobs.mapped("sale_order_id").write({"postnl_last_result": "queued"})
+                ok += len(jobs)
+                failed += len(orders) - len(jobs)
+                until = at or until
+
+            # bounded memory: persist, then drop every cached record of this chunk
+            self.env.flush_all()
+            self.env.invalidate_all()
+
+            done = min(start + chunk_size, len(order_ids))
+            _logger.info(
+                "[PostNL Resend] %s/%s orders %s", done, len(order_ids), "built" if dry_run else "queued",
+            )
+
+        return {
+            "mode": "Dry run" if dry_run else "Resend",
+            "candidates": len(order_ids),
+            "ok": ok,
+            "failed": failed,
+            "until": until,
+        }
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# the latest log of an order is never reclaimed: once its success was gone,
+# an older failure would become "latest" and the resend wizard would send an
+# order PostNL already accepted
+_NOT_LATEST_LOG = """(
+    sale_order_id IS NULL OR EXISTS (
+        SELECT 1 FROM postnl_order_log newer
+         WHERE newer.sale_order_id = postnl_order_log.sale_order_id
+           AND (newer.sent_at, newer.id) > (postnl_order_log.sent_at, postnl_order_log.id)
+    )
+)"""
+
+# (table, date column, condition of rows that succeeded, condition of rows that failed)
+RETENTION_TARGETS = [
+    ("postnl_order_log", "sent_at", f"success IS TRUE AND {_NOT_LATEST_LOG}", f"success IS NOT TRUE AND {_NOT_LATEST_LOG}"),
+    ("postnl_fulfilment_shipment_queue", "create_date", "state = 'done'", "state = 'dead'"),
+    # failed jobs still have attempts left; dead and cancelled ones are finished
+    ("postnl_outbound_queue", "create_date", "state = 'done'", "state IN ('dead', 'cancelled')"),
+]
+
+
+class PostNLRetention(models.AbstractModel):
+    """Deletes or archives old PostNL logs and finished queue jobs.
+
+    Parameters (ir.config_parameter):
+    - postnl.retention_mode: "delete" (default) or "archive" (move rows into
+      monthly <table>_archive_YYYYMM tables)
+    - postnl.retention_days_success / postnl.retention_days_failed: age in days
+      after which successful / failed rows go (90 / 365)
+    - postnl.retention_batch_size: rows per statement; each batch is committed,
+      so locks are only held for one batch
+    """
+
+    _name = "postnl.retention"
+    _description = "PostNL Retention"
+
+    def _commit(self):
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    @api.model
+    def run_retention(self):
+        config = self.env["postnl.config"].get_snapshot()
+        if config.retention_mode not in ("delete", "archive"):
+            _logger.warning("[PostNL] Unknown postnl.retention_mode %r, nothing reclaimed", config.retention_mode)
+            return {}
+
+        now = fields.Datetime.now()
+        cutoff_success = now - timedelta(days=config.retention_days_success)
+        cutoff_failed = now - timedelta(days=config.retention_days_failed)
+        archive = config.retention_mode == "archive"
+
+        self.env.flush_all()
+        report = {}
+        for table, date_column, success_where, failed_where in RETENTION_TARGETS:
+            reclaimed = 0
+            for where, cutoff in ((success_where, cutoff_success), (failed_where, cutoff_failed)):
+                reclaimed += self._purge(table, date_column, where, cutoff, config.retention_batch_size, archive)
+            report[table] = reclaimed
+
+        _logger.info(
+            "[PostNL] Retention (%s): %s",
+            config.retention_mode,
+            ", ".join(f"{table}={count}" for table, count in report.items()),
+        )
+        return report
+
+    def _purge(self, table, date_column, where, cutoff, batch_size, archive):
+        cr = self.env.cr
+        condition = f'{where} AND "{date_column}" < %s'
+
+        if not archive:
+            return self._purge_batches(
+                f"""
+                WITH batch AS (
+                    SELECT id FROM "{table}" WHERE {condition}
+                     ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+                )
+                DELETE FROM "{table}" t USING batch WHERE t.id = batch.id
+                """,
+                (cutoff, batch_size),
+            )
+
+        # archive: one destination table per calendar month of the date column
+        cr.execute(
+            f"""SELECT DISTINCT date_trunc('month', "{date_column}") FROM "{table}" WHERE {condition}""",
+            (cutoff,),
+        )
+        reclaimed = 0
+        for (month,) in sorted(cr.fetchall()):
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            archive_table, columns = self._ensure_archive_table(table, month)
+            cols = ", ".join(f'"{c}"' for c in columns)
+            reclaimed += self._purge_batches(
+                f"""
+                WITH batch AS (
+                    SELECT id FROM "{table}"
+                     WHERE {condition} AND "{date_column}" >= %s AND "{date_column}" < %s
+                     ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+                ), moved AS (
+                    DELETE FROM "{table}" t USING batch WHERE t.id = batch.id RETURNING t.*
+                )
+                INSERT INTO "{archive_table}" ({cols}) SELECT {cols} FROM moved
+                """,
+                (cutoff, month, next_month, batch_size),
+            )
+        return reclaimed
+
+    def _purge_batches(self, query, params):
+        """Run one batch statement until it affects no row, committing after each batch."""
+        reclaimed = 0
+        while True:
+            self.env.cr.execute(query, params)
+            count = self.env.cr.rowcount
+            self._commit()
+            reclaimed += count
+            if not count:
+                return reclaimed
+
+    def _ensure_archive_table(self, table, month):
+        """Create <table>_archive_YYYYMM (no indexes, no defaults) and add columns added since."""
+        cr = self.env.cr
+        archive_table = f"{table}_archive_{month:%Y%m}"
+        cr.execute(f'CREATE TABLE IF NOT EXISTS "{archive_table}" (LIKE "{table}")')
+
+        cr.execute(
+            """
+            SELECT column_name, format_type(a.atttypid, a.atttypmod)
+              FROM information_schema.columns c
+              JOIN pg_attribute a ON a.attrelid = c.table_name::regclass AND a.attname = c.column_name
+             WHERE c.table_name = %s AND c.table_schema = current_schema()
+             ORDER BY c.ordinal_position
+            """,
+            (table,),
+        )
+        source_columns = cr.fetchall()
+        cr.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = %s AND table_schema = current_schema()",
+            (archive_table,),
+        )
+        existing = {row[0] for row in cr.fetchall()}
+        for column, column_type in source_columns:
+            if column not in existing:
+                cr.execute(f'ALTER TABLE "{archive_table}" ADD COLUMN "{column}" {column_type}')
+        return archive_table, [column for column, _type in source_columns]
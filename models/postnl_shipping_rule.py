@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models
+from bisect import bisect_left
+
+from odoo import api, fields, models, tools
 
 
 class PostNLShippingRule(models.Model):
@@ -20,4 +22,56 @@ class PostNLShippingRule(models.Model):
     @api.depends('product_code', 'max_weight_kg')
     def _compute_name(self):
         for rec in self:
-            rec.name = f"{rec.product_code} <= {rec.max_weight_kg}kg"
\ No newline at end of file
+            rec.name = f"{rec.product_code} <= {rec.max_weight_kg}kg"
+
+    # -------------------------------------------------------------------------
+    # In-memory index (rebuilt only when rules change)
+    # -------------------------------------------------------------------------
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @tools.ormcache()
+    def _get_rule_index(self):
+        """{country_id: (max_weights, product_codes)}, both sorted by max weight then id."""
+        rules = self.sudo().search([('active', '=', True)], order='max_weight_kg asc, id asc')
+        index = {}
+        for rule in rules:
+            for country_id in rule.country_ids.ids:
+                weights, codes = index.setdefault(country_id, ([], []))
+                weights.append(rule.max_weight_kg)
+                codes.append(rule.product_code)
+        return {
+            country_id: (tuple(weights), tuple(codes))
+            for country_id, (weights, codes) in index.items()
+        }
+
+    @api.model
+    def resolve_product_codes(self, pairs, default=None):
+        """
+        pairs: [(country_id, total_weight_kg), ...]
+        Returns the productCode of the lightest active rule covering each pair,
+        or the default product code, without querying the database.
+        """
+        if default is None:
+            default = self.env['postnl.config'].get_snapshot().default_product_code
+        index = self._get_rule_index()
+
+        codes = []
+        for country_id, weight in pairs:
+            weights, rule_codes = index.get(country_id) or ((), ())
+            pos = bisect_left(weights, weight or 0.0)
+            codes.append(rule_codes[pos] if pos < len(weights) else default)
+        return codes
\ No newline at end of file
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, tools
+
+from ..utils.pack import compute_leaf_ratios, install_kit_version_triggers
+from ..utils.sku import compute_sku
+
+
+class ProductProduct(models.Model):
+    _inherit = "product.product"
+
+    postnl_sku = fields.Char(
+        string="PostNL SKU",
+        compute="_compute_postnl_sku",
+        store=True,
+        index=True,
+        help="SKU sent to PostNL, resolved with the Monta-like fallback order (see utils.sku).",
+    )
+    postnl_sku_from_name = fields.Boolean(
+        string="PostNL SKU from Name",
+        compute="_compute_postnl_sku",
+        store=True,
+        help="The product has no code: its PostNL SKU is the display name fallback.",
+    )
+
+    def _register_hook(self):
+        super()._register_hook()
+        install_kit_version_triggers(self.env)
+
+    def _postnl_sku_depends(self):
+        depends = [
+            "default_code",
+            "barcode",
+            "product_tmpl_id.default_code",
+            "product_tmpl_id.name",
+            "product_tmpl_id.seller_ids.product_code",
+            "product_tmpl_id.seller_ids.sequence",
+            "product_template_attribute_value_ids",
+        ]
+        # optional field from the Monta connector
+        if "monta_sku" in self._fields:
+            depends.append("monta_sku")
+        return depends
+
+    @api.depends(lambda self: self._postnl_sku_depends())
+    def _compute_postnl_sku(self):
+        for product in self:
+            code = compute_sku(product, fallback=False)
+            product.postnl_sku = code or compute_sku(product)
+            product.postnl_sku_from_name = not code
+
+    @tools.ormcache('product_id', 'version')
+    def _postnl_leaf_ratios(self, product_id, version):
+        """
+        Materialized pack/kit explosion: ((leaf_product_id, qty_per_unit), ...).
+        version is the kit counter (utils.pack.kit_version), so any BoM or
+        pack line change yields a new cache key, never used before even when
+        the transaction that cached it rolls back.
+        """
+        product = self.sudo().browse(product_id).exists()
+        return tuple(compute_leaf_ratios(self.env, product).items())
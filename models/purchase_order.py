@@ -11,40 +11,38 @@ class PurchaseOrder(models.Model):
     def button_confirm(self):
         res = super().button_confirm()
 
-        config = self.env["postnl.config"].search([], limit=1)
-        if not config:
+        config = self.env["postnl.config"].get_snapshot()
+        if not config.config_id:
             _logger.warning("[PostNL Repl] Config missing, skipping replenishment creation.")
             return res
 
-        allowed_companies = config.allowed_company_ids
+        # Prevent duplicates (one query for the whole batch)
+        existing = self.env["postnl.replenishment"].search([("purchase_order_id", "in", self.ids)])
+        done_po_ids = set(existing.mapped("purchase_order_id").ids)
 
+        vals_list = []
         for po in self:
             # ✅ company filter (SAFE DEFAULT: if allowed list empty -> skip)
-            if not allowed_companies or po.company_id not in allowed_companies:
+            if not config.is_company_allowed(po.company_id.id):
                 _logger.info(
                     "[PostNL Repl] Skipping PO %s (company=%s) not in allowed companies",
                     po.name, po.company_id.name
                 )
                 continue
 
-            # Prevent duplicates
-            exists = self.env["postnl.replenishment"].search(
-                [("purchase_order_id", "=", po.id)],
-                limit=1
-            )
-            if exists:
+            if po.id in done_po_ids:
                 continue
 
-            replenishment = self.env["postnl.replenishment"].create({
+            vals_list.append({
                 "name": po.name,
                 "purchase_order_id": po.id,
                 "merchant_code": config.merchant_code,
                 "fulfilment_location": config.fulfilment_location,
             })
 
-            try:
-                self.env["postnl.replenishment.service"].send_replenishment(replenishment)
-            except Exception as e:
-                _logger.error("[PostNL Repl] Failed for PO %s: %s", po.name, str(e))
+        # queued as draft; the dispatch cron sends them after this transaction
+        if vals_list:
+            self.env["postnl.replenishment"].create(vals_list)
+            self.env["postnl.replenishment"]._trigger_dispatch()
 
         return res
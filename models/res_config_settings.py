@@ -16,3 +16,9 @@ class ResConfigSettings(models.TransientModel):
 
     # ✅ NEW FIELD
     postnl_inbound_url = fields.Char(string="PostNL Inbound URL", config_parameter="postnl.inbound_url")
+
+    # HTTP transport (pooled keep-alive session)
+    postnl_http_pool_size = fields.Integer(string="PostNL HTTP Pool Size", config_parameter="postnl.http_pool_size", default=10)
+    postnl_connect_timeout = fields.Float(string="PostNL Connect Timeout (s)", config_parameter="postnl.connect_timeout", default=5.0)
+    postnl_read_timeout = fields.Float(string="PostNL Read Timeout (s)", config_parameter="postnl.read_timeout", default=30.0)
+    postnl_send_concurrency = fields.Integer(string="PostNL Parallel Sends", config_parameter="postnl.send_concurrency", default=4)
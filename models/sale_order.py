@@ -2,8 +2,6 @@
 import logging
 from odoo import models, fields
 
-from ..services.postnl_client import PostNLClient
-
 _logger = logging.getLogger(__name__)
 
 
@@ -16,40 +14,23 @@ class SaleOrder(models.Model):
     def action_confirm(self):
         res = super().action_confirm()
 
-        # PostNL config (singleton)
-        config = self.env["postnl.config"].search([], limit=1)
-        allowed_companies = config.allowed_company_ids if config else self.env["res.company"]
+        # PostNL config (cached snapshot)
+        config = self.env["postnl.config"].get_snapshot()
 
+        to_send = self.browse()
         for order in self:
             # ✅ company filter (SAFE DEFAULT: if allowed list empty -> skip)
-            if not config or not allowed_companies or order.company_id not in allowed_companies:
+            if not config.is_company_allowed(order.company_id.id):
                 _logger.info(
                     "[PostNL] Skipping %s (company=%s) not in allowed companies",
                     order.name, order.company_id.name
                 )
                 continue
+            to_send |= order
 
-            try:
-                client = PostNLClient(order.env)
-                ok = client.send_sale_order(order)
-                order.write({
-                    "postnl_last_send": fields.Datetime.now(),
-                    "postnl_last_result": "success" if ok else "error",
-                })
-            except Exception as e:
-                _logger.exception("[PostNL] Unexpected error in action_confirm for %s: %s", order.name, e)
-                order.write({
-                    "postnl_last_send": fields.Datetime.now(),
-                    "postnl_last_result": f"exception: {str(e)}",
-                })
-                order.env["ir.logging"].sudo().create({
-                    "name": f"PostNL Order {order.name}",
-                    "type": "server",
-                    "level": "ERROR",
-                    "message": f"Unexpected exception after confirm for {order.name}: {str(e)}",
-                    "path": "postnl_fulfilment_integration",
-                    "func": "action_confirm",
-                    "line": 0,
-                })
+        # ✅ Outbox: only enqueue here, the cron sends after commit
+        if to_send:
+            self.env["postnl.outbound.queue"].sudo().enqueue_orders(to_send)
+            to_send.write({"postnl_last_result": "queued"})
 
         return res
@@ -7,6 +7,8 @@ class SaleOrder(models.Model):
     _inherit = "sale.order"
 
     postnl_fulfilment_order_no = fields.Char(string="PostNL Fulfilment Order No", copy=False, index=True)
+    # exact orderNumber sent to PostNL; shipment messages are matched on it
+    postnl_order_number = fields.Char(string="PostNL Order Number", copy=False, readonly=True)
     postnl_message_no = fields.Char(string="PostNL Message No", copy=False)
     postnl_ship_date = fields.Date(string="PostNL Ship Date", copy=False)
     postnl_ship_time = fields.Char(string="PostNL Ship Time", copy=False)
@@ -23,6 +25,43 @@ class SaleOrder(models.Model):
     ], default="pending", copy=False)
     postnl_last_payload = fields.Text(string="PostNL Last Payload (Debug)", copy=False)
 
+    _sql_constraints = [
+        ("postnl_order_number_uniq", "unique(postnl_order_number)", "The PostNL order number must be unique."),
+    ]
+
+    @api.model
+    def _postnl_match_orders(self, order_nos):
+        """
+        {orderNo: sale.order} for a batch of shipment orderNos.
+        One IN query on the unique postnl_order_number; only numbers not found
+        there (orders sent before it was stored) fall back to one query on the
+        legacy keys.
+        """
+        order_nos = {no for no in order_nos if no}
+        if not order_nos:
+            return {}
+
+        matched = {
+            so.postnl_order_number: so
+            for so in self.search([("postnl_order_number", "in", list(order_nos))])
+        }
+
+        missing = list(order_nos - set(matched))
+        if missing:
+            legacy = self.search([
+                "|", "|",
+                ("postnl_fulfilment_order_no", "in", missing),
+                ("name", "in", missing),
+                ("client_order_ref", "in", missing),
+            ])
+            # same priority as the former per-item OR search
+            for field_name in ("postnl_fulfilment_order_no", "name", "client_order_ref"):
+                for so in legacy:
+                    value = so[field_name]
+                    if value in order_nos and value not in matched:
+                        matched[value] = so
+        return matched
+
     @api.depends("postnl_track_trace_code", "partner_shipping_id.zip")
     def _compute_postnl_tnt_url(self):
         for order in self:
@@ -34,6 +73,20 @@ class SaleOrder(models.Model):
             else:
                 order.postnl_track_trace_url = False
 
+    def _postnl_log_snapshot_vals(self):
+        """Fulfilment values copied onto postnl.order.log (so_* columns)."""
+        self.ensure_one()
+        return {
+            "so_postnl_fulfilment_status": self.postnl_fulfilment_status,
+            "so_postnl_fulfilment_order_no": self.postnl_fulfilment_order_no,
+            "so_postnl_message_no": self.postnl_message_no,
+            "so_postnl_ship_date": self.postnl_ship_date,
+            "so_postnl_ship_time": self.postnl_ship_time,
+            "so_postnl_track_trace_code": self.postnl_track_trace_code,
+            "so_postnl_track_trace_url": self.postnl_track_trace_url,
+            "so_postnl_last_webhook_at": self.postnl_last_webhook_at,
+        }
+
     def _postnl_apply_shipment(self, meta: dict, order_status: dict):
         """Apply 1 orderStatus item to sale.order"""
         self.ensure_one()
@@ -65,6 +118,11 @@ class SaleOrder(models.Model):
         self.postnl_last_webhook_at = fields.Datetime.now()
         self.postnl_last_payload = json.dumps({"meta": meta, "orderStatus": order_status}, indent=2)
 
+        # Keep the denormalised copy on the PostNL order logs in sync
+        self.env["postnl.order.log"].sudo().search([("sale_order_id", "=", self.id)]).write(
+            self._postnl_log_snapshot_vals()
+        )
+
         # Update picking tracking too (optional but useful)
         picking = self.picking_ids.filtered(lambda p: p.state not in ("done", "cancel"))[:1]
         if picking and barcode:
@@ -11,40 +11,53 @@ class StockPicking(models.Model):
     def action_done(self):
         res = super().action_done()
 
-        for picking in self:
-            if (
-                picking.picking_type_id.code != "incoming"
-                or picking.state != "done"
-            ):
+        config = self.env["postnl.config"].get_snapshot()
+        Replenishment = self.env["postnl.replenishment"]
+
+        incoming = self.filtered(lambda p: p.picking_type_id.code == "incoming" and p.state == "done")
+        if not incoming:
+            return res
+
+        if not config.config_id:
+            _logger.warning("PostNL config missing, skipping replenishment")
+            return res
+
+        # Receipts of a PO that was already announced on confirm are merged into
+        # that replenishment instead of being sent a second time.
+        has_po = "purchase_id" in incoming._fields
+        purchases = incoming.mapped("purchase_id") if has_po else []
+        domain = [("picking_id", "in", incoming.ids)]
+        if purchases:
+            domain = ["|", ("purchase_order_id", "in", purchases.ids)] + domain
+        existing = Replenishment.search(domain)
+        by_picking = {rec.picking_id.id for rec in existing if rec.picking_id}
+        by_purchase = {rec.purchase_order_id.id: rec for rec in existing if rec.purchase_order_id}
+
+        vals_list = []
+        for picking in incoming:
+            if picking.id in by_picking:
                 continue
 
-            if self.env["postnl.replenishment"].search([
-                ("picking_id", "=", picking.id)
-            ], limit=1):
-                continue
-
-            config = self.env["postnl.config"].search([], limit=1)
-            if not config:
-                _logger.warning("PostNL config missing, skipping replenishment")
+            po_replenishment = by_purchase.get(picking.purchase_id.id) if has_po and picking.purchase_id else None
+            if po_replenishment:
+                if not po_replenishment.picking_id:
+                    po_replenishment.picking_id = picking.id
+                _logger.info(
+                    "[PostNL Repl] Receipt %s already covered by replenishment %s",
+                    picking.name, po_replenishment.name,
+                )
                 continue
 
-            replenishment = self.env["postnl.replenishment"].create({
+            vals_list.append({
                 "name": picking.name,
                 "picking_id": picking.id,
                 "merchant_code": config.merchant_code,
                 "fulfilment_location": config.fulfilment_location,
             })
 
-            try:
-                self.env["postnl.replenishment.service"].send_replenishment(
-                    replenishment
-                )
-            except Exception as e:
-                _logger.error(
-                    "PostNL replenishment failed for %s: %s",
-                    picking.name,
-                    str(e),
-                )
-                # IMPORTANT: never block stock validation
+        # queued as draft: stock validation never waits on the PostNL API
+        if vals_list:
+            Replenishment.create(vals_list)
+            Replenishment._trigger_dispatch()
 
         return res
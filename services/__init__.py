@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from . import postnl_http
 from . import postnl_client
 from . import postnl_base
 from . import postnl_replenishment
@@ -18,6 +18,15 @@ class PostNLBaseService(models.AbstractModel):
             raise Exception("PostNL configuration not found.")
         return config
 
+    def get_config_snapshot(self):
+        """
+        Fetch the cached PostNL configuration snapshot (no ORM search / get_param)
+        """
+        snapshot = self.env["postnl.config"].get_snapshot()
+        if not snapshot.config_id:
+            raise Exception("PostNL configuration not found.")
+        return snapshot
+
     def get_replenishment_service(self):
         """
         Return replenishment service
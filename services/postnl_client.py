@@ -3,42 +3,53 @@ import json
 import logging
 import math
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-import requests
-
-from ..utils.sku import resolve_sku
-from ..utils.pack import explode_sale_order_line
+from .postnl_http import breaker_retry_in, build_headers, get_transport, is_instance_allowed
+from ..utils.circuit import CircuitOpenError
+from ..utils.address import parse_partner, parse_partners, split_name, split_street
+from ..utils.sku import resolve_skus
+from ..utils.compress import compress_text
+from ..utils.metrics import METRICS, StageTimer
+from ..utils.pack import explode_sale_order_line, kit_version
 
 _logger = logging.getLogger(__name__)
 
 
-def _split_street(street: str, street2: str = ""):
-    """Best-effort split of Odoo street into (street, houseNumber, addition)."""
-    full = " ".join([s for s in [street, street2] if s])
-    full = re.sub(r"\s+", " ", full).strip()
-    m = re.match(r"^(.*?)(?:\s+(\d+))(?:\s*([A-Za-z0-9\-\/]+))?$", full)
-    if not m:
-        return full[:30], 0, ""
-    return (m.group(1) or "").strip()[:30], int(m.group(2) or 0), (m.group(3) or "")[:30]
-
+# kept for callers importing them from here
+_split_street = split_street
+_split_name = split_name
 
-def _split_name(name: str):
-    name = (name or "").strip()
-    if not name:
-        return "", ""
-    parts = name.split()
-    return parts[0], " ".join(parts[1:]) if len(parts) > 1 else ""
+_UNSAFE_ORDERNUMBER_CHARS = re.compile(r"[^A-Z0-9\-]")
+ORDERNUMBER_MAX_LENGTH = 10
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
 
 def _sanitize_ordernumber(order_name: str, order_id: int):
     raw = (order_name or "").replace(" ", "").upper()
-    raw = re.sub(r"[^A-Z0-9\-]", "", raw)
+    raw = _UNSAFE_ORDERNUMBER_CHARS.sub("", raw)
     if not raw:
         raw = f"SO{order_id}"
     if raw.isalpha():
         raw = f"{raw[:8]}{order_id % 100:02d}"
-    return raw[-10:]
+    return raw[-ORDERNUMBER_MAX_LENGTH:]
+
+
+def _base36(value: int) -> str:
+    digits = ""
+    while True:
+        value, rest = divmod(value, 36)
+        digits = _BASE36[rest] + digits
+        if not value:
+            return digits
+
+
+def _unique_ordernumber(number: str, order_id: int):
+    """number with '-' + the order id (base 36) appended, cut to fit ORDERNUMBER_MAX_LENGTH."""
+    suffix = f"-{_base36(order_id)}"
+    return number[:max(ORDERNUMBER_MAX_LENGTH - len(suffix), 0)] + suffix
 
 
 def _ceil_qty(qty: float) -> int:
@@ -53,11 +64,32 @@ def _ceil_qty(qty: float) -> int:
         return int(qty or 0)
 
 
+class OutboundBatch:
+    """Orders of one send call, from prepare_batch() to record_batch()."""
+
+    def __init__(self, url, timer):
+        self.url = url
+        self.timer = timer
+        # [(sale.order, payload)] to POST, and their pending postnl.order.log rows in the same order
+        self.jobs = []
+        self.logs = None
+        # {order_id: bool} settled without a request (build errors, nothing to ship, guard, breaker)
+        self.results = {}
+
+
 class PostNLClient:
 
     def __init__(self, env):
         self.env = env
         self.icp = env['ir.config_parameter'].sudo()
+        self.config = env['postnl.config'].get_snapshot()
+        # postnl.order.log rows written by the last send call, per order id
+        self.logs = {}
+        self.last_log = None
+        # payload build errors of the last send call, per order id
+        self.errors = {}
+        # orders of the last send call refused by the open circuit breaker
+        self.short_circuited = set()
 
     # ------------------------------------------------
     # CONFIG HELPERS (FROM UI ONLY)
@@ -67,19 +99,15 @@ class PostNLClient:
         return self.icp.get_param(key, default)
 
     def _headers(self):
-        return {
-            "Content-Type": "application/json",
-            "customerNumber": self._get_param('postnl.customer_number'),
-            "apikey": self._get_param('postnl.api_key'),
-        }
+        return build_headers(self.config.customer_number, self.config.api_key)
 
     def _validate_config(self):
         missing = []
-        if not self._get_param('postnl.api_url'):
+        if not self.config.api_url:
             missing.append("API URL")
-        if not self._get_param('postnl.api_key'):
+        if not self.config.api_key:
             missing.append("API Key")
-        if not self._get_param('postnl.customer_number'):
+        if not self.config.customer_number:
             missing.append("Customer Number")
         if missing:
             raise ValueError(f"PostNL configuration missing: {', '.join(missing)}")
@@ -88,131 +116,164 @@ class PostNLClient:
     # URL GUARD (INSTANCE CHECK)
     # ------------------------------------------------
     def _is_instance_allowed(self):
-        """
-        If postnl.allowed_base_urls is empty => allow.
-        Otherwise web.base.url must match one of the allowed URLs (comma-separated).
-        """
-        web_url = (self.icp.get_param("web.base.url") or "").strip()
-        web_url = web_url.rstrip("/") + "/"
-
-        allowed = (self.icp.get_param("postnl.allowed_base_urls") or "").strip()
-        if not allowed:
-            return True
-
-        allowed_urls = [
-            u.strip().rstrip("/") + "/"
-            for u in allowed.split(",")
-            if u.strip()
-        ]
-
-        is_ok = web_url.lower() in [u.lower() for u in allowed_urls]
-        if not is_ok:
-            _logger.warning("[PostNL Guard] BLOCKED. web.base.url=%s allowed=%s", web_url, allowed_urls)
-        return is_ok
+        return is_instance_allowed(self.config, "[PostNL Guard]")
 
     # ------------------------------------------------
     # PRODUCT CODE (WEIGHT RULES)
     # ------------------------------------------------
 
     def _get_product_code(self, order, total_weight_kg):
-        country = order.partner_shipping_id.country_id or order.partner_id.country_id
-        if not country:
-            return self._get_param('postnl.default_product_code')
-
-        rule = self.env['postnl.shipping.rule'].sudo().search([
-            ('active', '=', True),
-            ('country_ids', 'in', country.id),
-            ('max_weight_kg', '>=', total_weight_kg),
-        ], order='max_weight_kg asc', limit=1)
-
-        return rule.product_code if rule else self._get_param('postnl.default_product_code')
+        return self._get_product_codes([(order, total_weight_kg)])[0]
+
+    def _get_product_codes(self, order_weights):
+        """[(order, total_weight_kg)] -> [productCode], resolved from the cached rule index."""
+        pairs = []
+        for order, total_weight_kg in order_weights:
+            country = order.partner_shipping_id.country_id or order.partner_id.country_id
+            pairs.append((country.id, total_weight_kg))
+        return self.env['postnl.shipping.rule'].sudo().resolve_product_codes(
+            pairs, default=self.config.default_product_code,
+        )
 
     # ------------------------------------------------
-    # MAIN API CALL
+    # PAYLOAD
     # ------------------------------------------------
 
-    def send_sale_order(self, order):
-        self._validate_config()
-        order.ensure_one()
+    def _prefetch_orders(self, orders):
+        """Load lines, products, partners and countries of a whole batch in a few queries."""
+        orders.mapped('order_line.product_id.type')
+        orders.mapped('order_line.product_uom_qty')
+        partners = orders.mapped('partner_id') | orders.mapped('partner_shipping_id') | orders.mapped('partner_invoice_id')
+        partners.mapped('country_id.code')
 
-        # ✅ URL GUARD
-        if not self._is_instance_allowed():
-            # Keep logging in your existing order log model if available
-            try:
-                self.env['postnl.order.log'].sudo().create({
-                    'sale_order_id': order.id,
-                    'order_name': order.name,
-                    'destination_country_id': (order.partner_shipping_id.country_id or order.partner_id.country_id).id,
-                    'total_weight_kg': 0.0,
-                    'product_code': '',
-                    'endpoint_url': self._get_param('postnl.api_url'),
-                    'request_payload': json.dumps({
-                        'blocked': True,
-                        'reason': 'Blocked by URL guard',
-                        'web_base_url': self.icp.get_param("web.base.url"),
-                        'allowed_base_urls': self.icp.get_param("postnl.allowed_base_urls"),
-                    }, ensure_ascii=False),
-                    'success': False,
-                    'http_status': 0,
-                    'error_message': 'Blocked by URL guard',
-                })
-            except Exception:
-                pass
-            return False
+    def _build_payloads(self, orders, timer=None):
+        """
+        Build payloads for a batch of orders.
+        Returns {order_id: (payload, total_weight_kg)}, payload None when nothing is
+        shippable, or {order_id: exception} when the order could not be built.
+        timer: StageTimer receiving the prefetch / explode / sku / payload / rules stages.
+        """
+        timer = timer or StageTimer()
+        query_count = self.env.cr.sql_log_count
+        with timer.stage('prefetch'):
+            self._prefetch_orders(orders)
+
+        # explode packs/kits -> leaf components, for the whole batch first
+        built = {}
+        exploded = {}
+        leaf_ids = set()
+        with timer.stage('explode'):
+            version = kit_version(self.env)
+            for order in orders:
+                try:
+                    items = []
+                    for l in order.order_line:
+                        p = l.product_id
+                        if not p or p.type == 'service':
+                            continue
+                        for leaf_product, leaf_qty_float in explode_sale_order_line(self.env, l, version=version):
+                            if leaf_product:
+                                items.append((leaf_product.id, leaf_qty_float))
+                                leaf_ids.add(leaf_product.id)
+                    exploded[order.id] = items
+                except Exception as e:
+                    built[order.id] = e
+
+        # one prefetch set for every leaf product of the batch
+        with timer.stage('sku'):
+            leaves = self.env['product.product'].browse(sorted(leaf_ids))
+            skus = resolve_skus(leaves)
+            leaf_info = {}
+            for leaf in leaves:
+                leaf_info[leaf.id] = (leaf.type, leaf.weight or 0.0, skus[leaf.id])
+
+        with timer.stage('payload'):
+            # every shipping / invoice partner of the batch parsed once (LRU-cached per write_date)
+            addresses = parse_partners(
+                orders.mapped('partner_shipping_id') | orders.mapped('partner_invoice_id') | orders.mapped('partner_id'),
+                maxsize=self.config.address_cache_size,
+            )
+            for order in orders:
+                if order.id in built:
+                    continue
+                try:
+                    built[order.id] = self._build_payload(order, exploded[order.id], leaf_info, addresses)
+                except Exception as e:
+                    built[order.id] = e
+
+        # productCode for the whole batch in one index lookup
+        with timer.stage('rules'):
+            to_resolve = [
+                (order, built[order.id]) for order in orders
+                if not isinstance(built[order.id], Exception) and built[order.id][0]
+            ]
+            codes = self._get_product_codes([(order, res[1]) for order, res in to_resolve])
+            for (order, res), code in zip(to_resolve, codes):
+                res[0]["productCode"] = code
+
+        _logger.debug(
+            "[PostNL] Built %s payloads in %s queries",
+            len(orders), self.env.cr.sql_log_count - query_count,
+        )
+        return built
+
+    def build_payloads(self, orders):
+        """Return {order_id: payload} for every order of the batch that has shippable lines."""
+        return {
+            order_id: res[0]
+            for order_id, res in self._build_payloads(orders).items()
+            if not isinstance(res, Exception) and res[0]
+        }
 
+    def _build_payload(self, order, items, leaf_info, addresses=None):
+        """Return (payload, total_weight_kg) for one order, or (None, 0.0) if nothing is shippable.
+
+        items: [(leaf_product_id, qty_float)] from the pack explosion
+        leaf_info: {leaf_product_id: (type, weight, sku)}
+        addresses: {partner_id: parsed address} from utils.address.parse_partners
+        """
         ship_partner = order.partner_shipping_id or order.partner_id
         inv_partner = order.partner_invoice_id or order.partner_id
 
-        order_number = _sanitize_ordernumber(order.name, order.id)
+        order_number = order.postnl_order_number or _sanitize_ordernumber(order.name, order.id)
         order_dt = (order.date_order or datetime.utcnow()).strftime("%Y-%m-%dT%H:%M:%S")
 
-        ship_street, ship_hn, ship_add = _split_street(ship_partner.street, ship_partner.street2)
-        inv_street, inv_hn, inv_add = _split_street(inv_partner.street, inv_partner.street2)
-
-        ship_fn, ship_ln = _split_name(ship_partner.name)
-        inv_fn, inv_ln = _split_name(inv_partner.name)
+        addresses = addresses or {}
+        ship_fn, ship_ln, ship_street, ship_hn, ship_add = addresses.get(ship_partner.id) or parse_partner(ship_partner)
+        inv_fn, inv_ln, inv_street, inv_hn, inv_add = addresses.get(inv_partner.id) or parse_partner(inv_partner)
 
         # Build order lines with pack expansion + Monta-like SKU resolver
         sku_qty_map = {}
         total_weight_kg = 0.0
 
-        for l in order.order_line:
-            p = l.product_id
-            if not p or p.type == 'service':
+        for leaf_id, leaf_qty_float in items:
+            leaf_type, leaf_weight, sku = leaf_info[leaf_id]
+            if leaf_type == 'service':
                 continue
 
-            # explode packs/kits -> leaf components
-            exploded = explode_sale_order_line(self.env, l)
-
-            for leaf_product, leaf_qty_float in exploded:
-                if not leaf_product or leaf_product.type == 'service':
-                    continue
-
-                qty_int = _ceil_qty(leaf_qty_float)
-                if qty_int <= 0:
-                    continue
+            qty_int = _ceil_qty(leaf_qty_float)
+            if qty_int <= 0:
+                continue
 
-                total_weight_kg += (leaf_product.weight or 0.0) * qty_int
+            total_weight_kg += leaf_weight * qty_int
 
-                sku = resolve_sku(leaf_product)
-                if not sku:
-                    continue
+            if not sku:
+                continue
 
-                sku_qty_map[sku] = sku_qty_map.get(sku, 0) + qty_int
+            sku_qty_map[sku] = sku_qty_map.get(sku, 0) + qty_int
 
         lines = [{"SKU": sku, "quantity": qty} for sku, qty in sku_qty_map.items()]
 
         if not lines:
-            _logger.info("[PostNL] Skip order %s (no shippable lines)", order.name)
-            return True
+            return None, 0.0
 
         payload = {
             "orderNumber": order_number,
             "webOrderNumber": order_number,
-            "merchantCode": self._get_param('postnl.merchant_code'),
-            "fulfilmentLocation": self._get_param('postnl.fulfilment_location'),
-            "channel": self._get_param('postnl.channel'),
-            "productCode": self._get_product_code(order, total_weight_kg),
+            "merchantCode": self.config.merchant_code,
+            "fulfilmentLocation": self.config.fulfilment_location,
+            "channel": self.config.channel,
+            "productCode": None,  # resolved per batch in _build_payloads
             "orderDateTime": order_dt,
             "orderLines": lines,
             "shipToAddress": {
@@ -240,46 +301,312 @@ class PostNLClient:
                 "email": inv_partner.email or "",
             },
         }
+        return payload, total_weight_kg
 
-        url = self._get_param('postnl.api_url')
-        timeout = int(self._get_param('postnl.timeout', '30'))
+    def _log_blocked(self, orders):
+        # Keep logging in your existing order log model if available
+        try:
+            request_payload = compress_text(json.dumps({
+                'blocked': True,
+                'reason': 'Blocked by URL guard',
+                'web_base_url': self.config.web_base_url,
+                'allowed_base_urls': ", ".join(sorted(self.config.allowed_base_urls)),
+            }, ensure_ascii=False))
+            logs = self.env['postnl.order.log'].sudo().create([{
+                'sale_order_id': order.id,
+                'order_name': order.name,
+                'destination_country_id': (order.partner_shipping_id.country_id or order.partner_id.country_id).id,
+                'total_weight_kg': 0.0,
+                'product_code': '',
+                'endpoint_url': self.config.api_url,
+                'request_payload_z': request_payload,
+                'success': False,
+                'http_status': 0,
+                'error_message': 'Blocked by URL guard',
+            } for order in orders])
+            for log in logs:
+                self.logs[log.sale_order_id.id] = log
+        except Exception:
+            pass
+
+    def _reserve_order_numbers(self, jobs, log_vals, results):
+        """
+        Store the exact orderNumber on each sale.order (unique), so shipment
+        messages can be matched with one indexed query. When the sanitized
+        name is already used by another order (same name in another company,
+        or two names with the same last 10 characters), the order gets a
+        number derived from its id instead (see _unique_ordernumber).
+        """
+        SaleOrder = self.env['sale.order'].sudo()
+        order_ids = [order.id for order, _payload in jobs]
+
+        def taken_numbers(numbers):
+            return {
+                so.postnl_order_number: so
+                for so in SaleOrder.search([
+                    ('postnl_order_number', 'in', list(numbers)),
+                    ('id', 'not in', order_ids),
+                ])
+            }
+
+        taken = taken_numbers(payload['orderNumber'] for _order, payload in jobs)
+        seen = {}
+        derived = {}
+        for order, payload in jobs:
+            number = payload['orderNumber']
+            owner = taken.get(number) or seen.get(number)
+            if owner and owner != order:
+                derived[order.id] = _unique_ordernumber(number, order.id)
+                _logger.info(
+                    "[PostNL] orderNumber %s of %s already used by %s, sending it as %s",
+                    number, order.name, owner.name, derived[order.id],
+                )
+                continue
+            seen[number] = order
+
+        # derived numbers end in the order id, so they only clash with an
+        # order whose name happens to look exactly like one of them
+        if derived:
+            taken.update(taken_numbers(derived.values()))
+
+        kept_jobs, kept_vals = [], []
+        for (order, payload), vals in zip(jobs, log_vals):
+            number = derived.get(order.id, payload['orderNumber'])
+            owner = taken.get(number) or (seen.get(number) if order.id in derived else None)
+            if owner and owner != order:
+                error = f"orderNumber {number} already used by {owner.name}"
+                _logger.error("[PostNL] Not sending %s: %s", order.name, error)
+                self.errors[order.id] = error
+                results[order.id] = False
+                continue
+            payload['orderNumber'] = payload['webOrderNumber'] = number
+            if order.postnl_order_number != number:
+                order.sudo().postnl_order_number = number
+            kept_jobs.append((order, payload))
+            kept_vals.append(vals)
+        return kept_jobs, kept_vals
 
-        log_rec = self.env['postnl.order.log'].sudo().create({
-            'sale_order_id': order.id,
-            'order_name': order.name,
-            'destination_country_id': ship_partner.country_id.id,
-            'total_weight_kg': total_weight_kg,
-            'product_code': payload['productCode'],
-            'endpoint_url': url,
-            'request_payload': json.dumps(payload, ensure_ascii=False),
-        })
+    # ------------------------------------------------
+    # HTTP (runs in worker threads: no env / cursor access)
+    # ------------------------------------------------
 
+    @staticmethod
+    def _post_payload(transport, url, headers, timeouts, payload, rate_limit=None, breaker=None):
+        started = time.perf_counter()
         try:
-            resp = requests.post(url, headers=self._headers(), json=payload, timeout=timeout)
+            resp = transport.post(url, payload, headers, timeouts, tag="[PostNL]", rate_limit=rate_limit, breaker=breaker)
             try:
                 body = resp.json()
             except Exception:
                 body = resp.text
+            return {'status': resp.status_code, 'body': body, 'error': None, 'seconds': time.perf_counter() - started}
+        except Exception as e:
+            return {'status': 0, 'body': None, 'error': e, 'seconds': time.perf_counter() - started}
 
-            log_rec.write({
-                'http_status': resp.status_code,
-                'success': 200 <= resp.status_code < 300,
-                'response_body': json.dumps(body, ensure_ascii=False)[:5000],
-                'error_message': False if 200 <= resp.status_code < 300 else str(body)[:255],
-            })
+    # ------------------------------------------------
+    # MAIN API CALL
+    # ------------------------------------------------
 
-            if 200 <= resp.status_code < 300:
-                _logger.info("[PostNL] Sent order %s successfully (HTTP %s)", order.name, resp.status_code)
-                return True
+    def send_sale_order(self, order):
+        order.ensure_one()
+        return self.send_sale_orders(order, concurrency=1)[order.id]
 
-            _logger.error("[PostNL] Failed to send order %s (HTTP %s)", order.name, resp.status_code)
-            return False
+    def send_sale_orders(self, orders, concurrency=None):
+        """
+        Send a batch of orders: prepare_batch(), dispatch_batch() and
+        record_batch() in one go. Returns {order_id: bool}.
+        """
+        batch = self.prepare_batch(orders)
+        if not batch.jobs:
+            return dict(batch.results)
+        return self.record_batch(batch, self.dispatch_batch(batch, concurrency))
 
-        except Exception as e:
-            _logger.exception("[PostNL] Exception sending order %s", order.name)
-            log_rec.write({
-                'success': False,
-                'http_status': 0,
-                'error_message': str(e)[:255],
+    def prepare_batch(self, orders):
+        """
+        Everything that happens before the HTTP calls, on the calling cursor:
+        payloads, reserved orderNumbers and one pending log row per order.
+        Nothing is sent yet, so a caller may run this in a savepoint and
+        commit it before dispatch_batch().
+        """
+        self._validate_config()
+        self.logs = {}
+        self.errors = {}
+        self.short_circuited = set()
+        self.last_log = None
+
+        url = self.config.api_url
+        batch = OutboundBatch(url, StageTimer())
+
+        # ✅ URL GUARD
+        if not self._is_instance_allowed():
+            self._log_blocked(orders)
+            self.last_log = self.logs.get(orders[-1:].id) if orders else None
+            batch.results = {order.id: False for order in orders}
+            return batch
+
+        # ✅ CIRCUIT BREAKER: PostNL known to be down -> no payloads, no logs, no waiting
+        retry_in = breaker_retry_in(url, self.config.breaker)
+        if retry_in:
+            _logger.warning("[PostNL] Circuit open for %s, %s orders deferred (retry in %.0fs)", url, len(orders), retry_in)
+            message = f"PostNL unavailable (circuit open), retry in {retry_in:.0f}s"
+            for order in orders:
+                self.errors[order.id] = message
+                self.short_circuited.add(order.id)
+            batch.results = {order.id: False for order in orders}
+            return batch
+
+        timer = batch.timer
+        built = self._build_payloads(orders, timer)
+
+        jobs = []
+        log_vals = []
+        for order in orders:
+            res = built[order.id]
+            if isinstance(res, Exception):
+                _logger.error("[PostNL] Could not build payload for order %s: %s", order.name, res)
+                self.errors[order.id] = str(res)
+                batch.results[order.id] = False
+                continue
+
+            payload, total_weight_kg = res
+
+            if not payload:
+                _logger.info("[PostNL] Skip order %s (no shippable lines)", order.name)
+                batch.results[order.id] = True
+                continue
+
+            ship_partner = order.partner_shipping_id or order.partner_id
+            jobs.append((order, payload))
+            log_vals.append({
+                'sale_order_id': order.id,
+                'order_name': order.name,
+                'destination_country_id': ship_partner.country_id.id,
+                'total_weight_kg': total_weight_kg,
+                'product_code': payload['productCode'],
+                'endpoint_url': url,
+                **order._postnl_log_snapshot_vals(),
+            })
+
+        with timer.stage('reserve'):
+            jobs, log_vals = self._reserve_order_numbers(jobs, log_vals, batch.results)
+        if not jobs:
+            return batch
+
+        # after reserve: the orderNumber in the payload is final
+        with timer.stage('serialize'):
+            for (_order, payload), vals in zip(jobs, log_vals):
+                vals['request_payload_z'] = compress_text(json.dumps(payload, ensure_ascii=False))
+
+        with timer.stage('log_create'):
+            batch.logs = self.env['postnl.order.log'].sudo().create(log_vals)
+        batch.jobs = jobs
+        for (order, _payload), log_rec in zip(jobs, batch.logs):
+            self.logs[order.id] = log_rec
+        return batch
+
+    def dispatch_batch(self, batch, concurrency=None):
+        """POST every prepared payload on the bounded thread pool; returns one response dict per job."""
+        url = batch.url
+        transport = get_transport(self.config.http_pool_size)
+        headers = self._headers()
+        timeouts = self.config.timeouts
+        rate_limit = self.config.rate_limit
+        breaker = self.config.breaker
+        if concurrency is None:
+            concurrency = self.config.send_concurrency
+        workers = max(1, min(concurrency, transport.pool_size, len(batch.jobs)))
+
+        with batch.timer.stage('http'):
+            if workers == 1:
+                return [self._post_payload(transport, url, headers, timeouts, payload, rate_limit, breaker) for _order, payload in batch.jobs]
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="postnl-send") as pool:
+                return list(pool.map(
+                    lambda job: self._post_payload(transport, url, headers, timeouts, job[1], rate_limit, breaker),
+                    batch.jobs,
+                ))
+
+    def record_batch(self, batch, responses):
+        """
+        Turn the HTTP answers into results and write them on the log rows.
+        The results only depend on the answers: if writing the logs fails,
+        an order PostNL accepted is still reported as sent.
+        """
+        results = dict(batch.results)
+        vals_list = []
+        for (order, _payload), res in zip(batch.jobs, responses):
+            METRICS.observe('postnl_http_request_seconds', res['seconds'], endpoint='order')
+
+            if res['error'] is not None:
+                if isinstance(res['error'], CircuitOpenError):
+                    self.short_circuited.add(order.id)
+                    METRICS.inc('postnl_requests_total', endpoint='order', outcome='short_circuited')
+                else:
+                    METRICS.inc('postnl_requests_total', endpoint='order', outcome='exception')
+                _logger.error("[PostNL] Exception sending order %s: %s", order.name, res['error'])
+                self.errors[order.id] = str(res['error'])[:255]
+                vals_list.append({
+                    'success': False,
+                    'http_status': 0,
+                    'error_message': str(res['error'])[:255],
+                })
+                results[order.id] = False
+                continue
+
+            ok = 200 <= res['status'] < 300
+            vals_list.append({
+                'http_status': res['status'],
+                'success': ok,
+                'response_body_z': compress_text(json.dumps(res['body'], ensure_ascii=False)[:5000]),
+                'error_message': False if ok else str(res['body'])[:255],
             })
-            return False
+            METRICS.inc(
+                'postnl_requests_total', endpoint='order',
+                outcome='success' if ok else ('throttled' if res['status'] == 429 else 'http_error'),
+            )
+            if ok:
+                _logger.info("[PostNL] Sent order %s successfully (HTTP %s)", order.name, res['status'])
+            else:
+                _logger.error("[PostNL] Failed to send order %s (HTTP %s)", order.name, res['status'])
+            results[order.id] = ok
+
+        # write every result back on the main cursor
+        try:
+            with self.env.cr.savepoint():
+                with batch.timer.stage('log_write'):
+                    for log_rec, vals in zip(batch.logs, vals_list):
+                        log_rec.write(vals)
+                    batch.logs.flush_recordset()
+                self._write_timings(batch, responses)
+        except Exception:
+            _logger.exception("[PostNL] Could not record the results of %s sent orders", len(batch.jobs))
+
+        for stage, seconds in batch.timer.seconds.items():
+            METRICS.observe('postnl_stage_seconds', seconds, endpoint='order', stage=stage)
+
+        self.last_log = batch.logs[-1:]
+        return results
+
+    def _write_timings(self, batch, responses):
+        """
+        stage_timings / duration_ms of every log in one UPDATE, written last so
+        they include log_write. Batch stages are shared evenly between the
+        orders; http is each order's own call.
+        """
+        shared_ms = batch.timer.as_ms(share=1.0 / len(batch.jobs))
+        shared_ms.pop('http', None)
+        ids, timings, durations = [], [], []
+        for log_rec, res in zip(batch.logs, responses):
+            stage_ms = dict(shared_ms, http=round(res['seconds'] * 1000.0, 3))
+            ids.append(log_rec.id)
+            timings.append(json.dumps(stage_ms))
+            durations.append(round(sum(stage_ms.values()), 3))
+        self.env.cr.execute(
+            """
+            UPDATE postnl_order_log l
+               SET stage_timings = v.stage_timings, duration_ms = v.duration_ms
+              FROM unnest(%s::int[], %s::text[], %s::float8[]) AS v(id, stage_timings, duration_ms)
+             WHERE l.id = v.id
+            """,
+            (ids, timings, durations),
+        )
+        batch.logs.invalidate_recordset(['stage_timings', 'duration_ms'])
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from odoo.modules.registry import Registry
+
+from ..utils.circuit import CircuitBreaker, CircuitOpenError
+from ..utils.metrics import METRICS
+from ..utils.ratelimit import SharedTokenBucket, TokenBucket, parse_retry_after
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+# a worker takes this many seconds' worth of tokens from the shared bucket at once
+LEASE_SECONDS = 0.2
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Throttling of an endpoint; rate 0 disables the token bucket.
+
+    With a dbname the bucket is shared by every worker process of that
+    database (postnl.rate.bucket), otherwise it is per process.
+    """
+
+    rate: float = 0.0
+    burst: int = 1
+    max_retries: int = 3
+    max_retry_after: float = 60.0
+    dbname: str = ""
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """Circuit breaker of one worker process; threshold 0 disables it."""
+
+    threshold: int = 5
+    reset_seconds: float = 30.0
+
+
+def normalize_base_url(url: str) -> str:
+    """Lowercase, trimmed and with exactly one trailing slash."""
+    return ((url or "").strip().rstrip("/") + "/").lower()
+
+
+def is_instance_allowed(config, tag="[PostNL Guard]"):
+    """
+    If postnl.allowed_base_urls is empty => allow.
+    Otherwise web.base.url must match one of the allowed URLs (comma-separated).
+    config: PostNLSnapshot
+    """
+    ok = config.instance_allowed
+    if not ok:
+        _logger.warning(
+            "%s BLOCKED. web.base.url=%s allowed=%s", tag, config.web_base_url, sorted(config.allowed_base_urls)
+        )
+    return ok
+
+
+def build_headers(customer_number, api_key):
+    return {
+        "Content-Type": "application/json",
+        "customerNumber": customer_number or "",
+        "apikey": api_key or "",
+    }
+
+
+class PostNLTransport:
+    """Keep-alive HTTP session shared by every PostNL call of one worker process.
+
+    requests.Session is safe to share between threads for plain requests; the
+    urllib3 pool hands out one connection per concurrent call and keeps it
+    open for the next one, so TCP/TLS handshakes are only paid once per
+    connection instead of once per order.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self.pid = os.getpid()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._adapters = [adapter]
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._throttled = 0
+        self._waited = 0.0
+
+    def post(self, url, payload, headers, timeout, tag="[PostNL]", rate_limit=None, breaker=None):
+        """
+        POST through the endpoint's circuit breaker and token bucket.
+
+        - breaker open: CircuitOpenError is raised at once, without a request;
+          after reset_seconds one probe call is let through (half-open).
+          Connection errors, timeouts and 5xx answers count as failures.
+        - 429: the bucket is paused for Retry-After seconds (for every worker
+          sharing it) and the call is retried up to
+          rate_limit.max_retries times; the last 429 is returned.
+        """
+        breaker = breaker or BreakerPolicy()
+        circuit = get_breaker(url, breaker.threshold, breaker.reset_seconds) if breaker.threshold > 0 else None
+        if circuit and not circuit.allow():
+            raise CircuitOpenError(endpoint_key(url), circuit.retry_in())
+
+        try:
+            resp = self._post_throttled(url, payload, headers, timeout, tag, rate_limit or RateLimit())
+        except Exception:
+            if circuit:
+                circuit.record_failure()
+            raise
+        if circuit:
+            if resp.status_code >= 500:
+                circuit.record_failure()
+            else:
+                circuit.record_success()
+        return resp
+
+    def _post_throttled(self, url, payload, headers, timeout, tag, rate_limit):
+        limiter = get_limiter(url, rate_limit.rate, rate_limit.burst, rate_limit.dbname) if rate_limit.rate > 0 else None
+
+        attempt = 0
+        while True:
+            waited = limiter.acquire() if limiter else 0.0
+            resp = self._send(url, payload, headers, timeout, tag, waited)
+            if resp.status_code != 429 or attempt >= rate_limit.max_retries:
+                return resp
+
+            delay = parse_retry_after(resp.headers.get("Retry-After"), default=2.0 ** attempt)
+            if delay > rate_limit.max_retry_after:
+                _logger.warning("%s 429 from %s, Retry-After %.0fs too long, giving up", tag, url, delay)
+                return resp
+            attempt += 1
+            with self._lock:
+                self._throttled += 1
+            METRICS.inc("postnl_http_retries_total", url=endpoint_key(url))
+            _logger.info("%s 429 from %s, retry %s in %.1fs", tag, url, attempt, delay)
+            if limiter:
+                limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+    def _send(self, url, payload, headers, timeout, tag, waited):
+        started = time.monotonic()
+        _logger.debug("%s → POST %s", tag, url)
+        try:
+            resp = self.session.post(url, json=payload, headers=headers, timeout=timeout)
+        except Exception:
+            with self._lock:
+                self._requests += 1
+                self._errors += 1
+                self._waited += waited
+            raise
+        with self._lock:
+            self._requests += 1
+            self._waited += waited
+        _logger.debug("%s ← (%s) %s in %.0fms", tag, resp.status_code, url, (time.monotonic() - started) * 1000)
+        return resp
+
+    def stats(self):
+        """Connection reuse counters, summed over every host pool of the session."""
+        connections = 0
+        pool_requests = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+        with self._lock:
+            total, errors, throttled, waited = self._requests, self._errors, self._throttled, self._waited
+        return {
+            "pool_size": self.pool_size,
+            "requests": total,
+            "errors": errors,
+            "throttled": throttled,
+            "limiter_wait_seconds": round(waited, 3),
+            "connections_opened": connections,
+            "connections_reused": max(pool_requests - connections, 0),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(pool_size=DEFAULT_POOL_SIZE):
+    """Return the transport of this worker, (re)built when the pool size changes or after a fork."""
+    global _transport
+    with _transport_lock:
+        current = _transport
+        if current is None or current.pid != os.getpid() or current.pool_size != pool_size:
+            # the old session is not closed: other threads may still be using it
+            _transport = current = PostNLTransport(pool_size)
+        return current
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def endpoint_key(url):
+    """scheme://host/path of a URL: the unit throttled and circuit-broken together."""
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+_RESERVE_SQL = """
+    INSERT INTO postnl_rate_bucket AS b (endpoint, tokens, updated_at)
+    VALUES (%(endpoint)s, %(burst)s - %(n)s, clock_timestamp() AT TIME ZONE 'UTC')
+    ON CONFLICT (endpoint) DO UPDATE
+       SET tokens = LEAST(
+               %(burst)s,
+               b.tokens + GREATEST(EXTRACT(EPOCH FROM excluded.updated_at - b.updated_at)::float8, 0) * %(rate)s
+           ) - %(n)s,
+           updated_at = GREATEST(b.updated_at, excluded.updated_at)
+    RETURNING b.tokens, GREATEST(EXTRACT(EPOCH FROM b.updated_at - (clock_timestamp() AT TIME ZONE 'UTC'))::float8, 0)
+"""
+
+_PAUSE_SQL = """
+    UPDATE postnl_rate_bucket
+       SET tokens = CASE WHEN updated_at < %(resume)s THEN LEAST(tokens, 0) ELSE tokens END,
+           updated_at = GREATEST(updated_at, %(resume)s)
+     WHERE endpoint = %(endpoint)s
+"""
+
+
+def _db_reserve(dbname, endpoint, rate, burst, n):
+    """Take n tokens from the shared bucket (own transaction); seconds until they are all available."""
+    with Registry(dbname).cursor() as cr:
+        cr.execute(_RESERVE_SQL, {"endpoint": endpoint, "rate": rate, "burst": burst, "n": n})
+        tokens, ahead = cr.fetchone()
+    return ahead + max(-tokens, 0.0) / rate
+
+
+def _db_pause(dbname, endpoint, seconds):
+    with Registry(dbname).cursor() as cr:
+        cr.execute(
+            "SELECT (clock_timestamp() AT TIME ZONE 'UTC') + make_interval(secs => %s)", (float(seconds),)
+        )
+        cr.execute(_PAUSE_SQL, {"endpoint": endpoint, "resume": cr.fetchone()[0]})
+
+
+def get_limiter(url, rate, burst, dbname=None):
+    """
+    Token bucket of one endpoint, shared by every thread of this process and,
+    with a dbname, by every process of that database.
+    """
+    endpoint = endpoint_key(url)
+    key = (os.getpid(), endpoint, dbname or "")
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None or limiter.rate != float(rate) or limiter.burst != max(float(burst), 1.0):
+            if dbname:
+                limiter = SharedTokenBucket(
+                    rate, burst,
+                    reserve=lambda n: _db_reserve(dbname, endpoint, float(rate), max(float(burst), 1.0), n),
+                    pause_shared=lambda seconds: _db_pause(dbname, endpoint, seconds),
+                    lease=int(rate * LEASE_SECONDS),
+                )
+            else:
+                limiter = TokenBucket(rate, burst)
+            _limiters[key] = limiter
+        return limiter
+
+
+def limiter_stats():
+    """{endpoint: bucket stats} of this process."""
+    pid = os.getpid()
+    with _limiters_lock:
+        items = [(key, limiter) for key, limiter in _limiters.items() if key[0] == pid]
+    return {endpoint: limiter.stats() for (_pid, endpoint, _dbname), limiter in items}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url, threshold, reset_seconds):
+    """Circuit breaker of one endpoint, shared by every thread of this process."""
+    key = (os.getpid(), endpoint_key(url))
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None or breaker.threshold != max(int(threshold), 1) or breaker.reset_seconds != float(reset_seconds):
+            _breakers[key] = breaker = CircuitBreaker(threshold, reset_seconds)
+        return breaker
+
+
+def breaker_retry_in(url, policy):
+    """Seconds before `url` may be called again (0 = now), without taking a half-open probe slot."""
+    if not policy or policy.threshold <= 0:
+        return 0.0
+    return get_breaker(url, policy.threshold, policy.reset_seconds).retry_in()
+
+
+def breaker_stats():
+    """{endpoint: breaker stats} of this process."""
+    pid = os.getpid()
+    with _breakers_lock:
+        items = [(key, breaker) for key, breaker in _breakers.items() if key[0] == pid]
+    return {endpoint: breaker.stats() for (_pid, endpoint), breaker in items}
@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
+import json
 import logging
-import requests
+import time
 from odoo import models, fields
 
+from ..utils.circuit import CircuitOpenError
+from ..utils.compress import compress_text
+from ..utils.metrics import METRICS, StageTimer
+from ..utils.replenishment import aggregate_lines, part_number, split_lines
+from ..utils.sku import resolve_skus
+from .postnl_http import build_headers, get_transport, is_instance_allowed
+
 _logger = logging.getLogger(__name__)
 
 
@@ -10,41 +18,126 @@ class PostNLReplenishmentService(models.AbstractModel):
     _name = "postnl.replenishment.service"
     _description = "PostNL Replenishment Service"
 
-    def _is_instance_allowed(self):
-        icp = self.env["ir.config_parameter"].sudo()
-        web_url = (icp.get_param("web.base.url") or "").strip().rstrip("/") + "/"
-        allowed = (icp.get_param("postnl.allowed_base_urls") or "").strip()
-
-        if not allowed:
-            return True
-
-        allowed_urls = [
-            u.strip().rstrip("/") + "/"
-            for u in allowed.split(",")
-            if u.strip()
-        ]
-
-        ok = web_url.lower() in [u.lower() for u in allowed_urls]
-        if not ok:
-            _logger.warning("[PostNL Repl Guard] BLOCKED. web.base.url=%s allowed=%s", web_url, allowed_urls)
-        return ok
+    def _is_instance_allowed(self, config=None):
+        config = config or self.env["postnl.config"].get_snapshot()
+        return is_instance_allowed(config, "[PostNL Repl Guard]")
 
     def send_replenishment(self, replenishment):
         """
         replenishment: postnl.replenishment record
         Supports sending from purchase order OR incoming picking.
         """
-        config = self.env["postnl.base.service"].get_config()
+        config = self.env["postnl.base.service"].get_config_snapshot()
 
         # ✅ URL GUARD
-        if not self._is_instance_allowed():
+        if not self._is_instance_allowed(config):
             replenishment.state = "error"
             replenishment.response_message = "Blocked by instance URL guard (web.base.url not allowed)"
             return False
 
+        timer = StageTimer()
+        try:
+            return self._send_parts(replenishment, config, timer)
+        finally:
+            stage_ms = timer.as_ms()
+            replenishment.write({
+                "stage_timings": json.dumps(stage_ms),
+                "duration_ms": round(sum(stage_ms.values()), 3),
+            })
+            for stage, seconds in timer.seconds.items():
+                METRICS.observe("postnl_stage_seconds", seconds, endpoint="replenishment", stage=stage)
+
+    def _send_parts(self, replenishment, config, timer):
         # ✅ Get inbound URL from configuration (fallback safe)
-        inbound_url = config.postnl_inbound_url or "https://api-sandbox.postnl.nl/v2/fulfilment/replenishment"
+        inbound_url = config.inbound_url
+
+        with timer.stage("build"):
+            payloads = self.build_payloads(replenishment, config)
+        replenishment.parts_total = len(payloads)
+        with timer.stage("serialize"):
+            replenishment.request_payload_z = compress_text(
+                json.dumps(payloads[0] if len(payloads) == 1 else payloads, ensure_ascii=False)
+            )
+
+        headers = build_headers(config.customer_number, config.api_key)
+
+        transport = get_transport(config.http_pool_size)
+        responses = []
+        # resume after the parts already accepted by a previous attempt
+        for payload in payloads[replenishment.parts_sent:]:
+            _logger.info(
+                "[PostNL Repl] → POST %s | %s (%s lines)",
+                inbound_url, payload["orderNumber"], len(payload["orderLines"]),
+            )
+            try:
+                with timer.stage("http"):
+                    started = time.perf_counter()
+                    response = transport.post(
+                        inbound_url,
+                        payload,
+                        headers,
+                        config.timeouts,
+                        tag="[PostNL Repl]",
+                        rate_limit=config.inbound_rate_limit,
+                        breaker=config.breaker,
+                    )
+                METRICS.observe("postnl_http_request_seconds", time.perf_counter() - started, endpoint="replenishment")
+            except CircuitOpenError:
+                # nothing was sent for this part; the dispatcher defers the replenishment
+                METRICS.inc("postnl_requests_total", endpoint="replenishment", outcome="short_circuited")
+                if responses:
+                    replenishment.response_message = "\n".join(responses)
+                raise
+            except Exception as e:
+                METRICS.inc("postnl_requests_total", endpoint="replenishment", outcome="exception")
+                # keep parts_sent: the parts accepted so far must not be sent again
+                responses.append(f"{payload['orderNumber']}: {e}")
+                replenishment.state = "error"
+                replenishment.response_message = "\n".join(responses)
+                _logger.error("[PostNL Repl] ✖ %s: %s", payload["orderNumber"], e)
+                return False
+            responses.append(f"{payload['orderNumber']}: {response.text}")
+
+            if response.status_code not in (200, 202):
+                METRICS.inc(
+                    "postnl_requests_total", endpoint="replenishment",
+                    outcome="throttled" if response.status_code == 429 else "http_error",
+                )
+                replenishment.state = "error"
+                replenishment.response_message = "\n".join(responses)
+                _logger.error("[PostNL Repl] ← (%s) %s", response.status_code, response.text)
+                return False
+            METRICS.inc("postnl_requests_total", endpoint="replenishment", outcome="success")
+            replenishment.parts_sent += 1
+
+        replenishment.state = "sent"
+        replenishment.response_message = "\n".join(responses)
+        _logger.info("[PostNL Repl] ← SENT %s part(s) for %s", replenishment.parts_total, replenishment.name)
+        return True
 
+    def _collect_lines(self, replenishment):
+        """
+        (product, qty) of the PO lines, or of the receipt moves when there is
+        no PO. Services (freight, fees, down payments) are never announced
+        as inbound stock.
+        """
+        po = replenishment.purchase_order_id
+        picking = replenishment.picking_id
+        if po:
+            lines = [(line.product_id, line.product_qty or 0) for line in po.order_line if line.product_id]
+        elif picking:
+            lines = [(move.product_id, move.product_uom_qty or 0) for move in picking.move_ids_without_package if move.product_id]
+        else:
+            return []
+        return [(product, qty) for product, qty in lines if product.type != "service"]
+
+    def build_payloads(self, replenishment, config=None):
+        """
+        Replenishment payload(s): order lines aggregated per resolved SKU, split
+        into numbered parts (name-1, name-2, ...) above
+        postnl.replenishment_max_lines lines / postnl.replenishment_max_bytes bytes.
+        """
+        config = config or self.env["postnl.config"].get_snapshot()
         po = replenishment.purchase_order_id
         picking = replenishment.picking_id
 
@@ -59,69 +152,28 @@ class PostNLReplenishmentService(models.AbstractModel):
             order_date = fields.Date.today().isoformat()
             planned_date = fields.Date.today().isoformat()
 
-        payload = {
+        header = {
             "orderNumber": replenishment.name,
             "merchantCode": replenishment.merchant_code,
             "fulfilmentLocation": replenishment.fulfilment_location,
             "orderDate": order_date,
             "plannedReceiptDate": planned_date,
-            "orderLines": []
-        }
-
-        # Lines from PO
-        if po:
-            for line in po.order_line:
-                product = line.product_id
-                if not product or not product.default_code:
-                    continue
-                qty = int(line.product_qty or 0)
-                if qty <= 0:
-                    continue
-                payload["orderLines"].append({
-                    "SKU": product.default_code,
-                    "quantity": qty,
-                    "description": (product.name or "")[:35],
-                })
-
-        # Lines from picking (if provided)
-        elif picking:
-            for move in picking.move_ids_without_package:
-                product = move.product_id
-                if not product or not product.default_code:
-                    continue
-                qty = int(move.product_uom_qty or 0)
-                if qty <= 0:
-                    continue
-                payload["orderLines"].append({
-                    "SKU": product.default_code,
-                    "quantity": qty,
-                    "description": (product.name or "")[:35],
-                })
-
-        replenishment.request_payload = str(payload)
-
-        headers = {
-            "Content-Type": "application/json",
-            "apikey": config.api_key,
-            "customerNumber": config.customer_number,
         }
 
-        _logger.info("[PostNL Repl] → POST %s | %s", inbound_url, payload)
-
-        response = requests.post(
-            inbound_url,
-            json=payload,
-            headers=headers,
-            timeout=30
+        raw = self._collect_lines(replenishment)
+        products = self.env["product.product"].browse({product.id for product, _qty in raw})
+        # only real codes: a product without one is skipped, as before, not sent under its name
+        skus = resolve_skus(products, fallback=False)
+        for product in products:
+            if not skus[product.id]:
+                _logger.info("[PostNL Repl] %s: skipping %s (no SKU)", replenishment.name, product.display_name)
+        lines = aggregate_lines(
+            (skus.get(product.id), qty, product.name) for product, qty in raw
         )
 
-        if response.status_code not in (200, 202):
-            replenishment.state = "error"
-            replenishment.response_message = response.text
-            _logger.error("[PostNL Repl] ← (%s) %s", response.status_code, response.text)
-            return False
-
-        replenishment.state = "sent"
-        replenishment.response_message = response.text
-        _logger.info("[PostNL Repl] ← (%s) SENT for %s", response.status_code, replenishment.name)
-        return True
+        overhead = len(json.dumps(dict(header, orderLines=[]), ensure_ascii=False))
+        chunks = split_lines(lines, config.replenishment_max_lines, config.replenishment_max_bytes, overhead)
+        return [
+            dict(header, orderNumber=part_number(replenishment.name, index, len(chunks)), orderLines=chunk)
+            for index, chunk in enumerate(chunks)
+        ]
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from . import test_address
+from . import test_backoff
+from . import test_circuit
+from . import test_compress
+from . import test_kit_version
+from . import test_metrics
+from . import test_payload_fields
+from . import test_payload_queries
+from . import test_queues
+from . import test_ratelimit
+from . import test_replenishment_lines
+from . import test_retention
+from . import test_sku
+from . import test_webhook
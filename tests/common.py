@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+
+class FakeClock:
+    """Manual clock for the time-based helpers; sleep() advances it instead of blocking."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..utils.address import _address_cache, parse_partners
+
+
+@tagged("post_install", "-at_install")
+class TestAddressCache(TransactionCase):
+
+    def test_second_edit_in_one_transaction_is_parsed(self):
+        partner = self.env["res.partner"].create({"name": "Jan de Vries", "street": "Hoofdstraat 1"})
+        self.assertEqual(parse_partners(partner)[partner.id], ("Jan", "de Vries", "Hoofdstraat", 1, ""))
+
+        # same transaction, so write_date does not move
+        write_date = partner.write_date
+        partner.write({"street": "Kerkstraat 12B"})
+        partner.flush_recordset()
+        self.assertEqual(partner.write_date, write_date)
+        self.assertEqual(parse_partners(partner)[partner.id], ("Jan", "de Vries", "Kerkstraat", 12, "B"))
+
+    def test_key_holds_the_database(self):
+        partner = self.env["res.partner"].create({"name": "Piet", "street": "Dorpsweg 3"})
+        parse_partners(partner)
+        self.assertTrue(any(key[:2] == (self.env.cr.dbname, partner.id) for key in _address_cache._data))
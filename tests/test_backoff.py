@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo.tests.common import BaseCase
+
+from ..utils.backoff import backoff_delay, next_attempt_at
+
+
+class TestBackoff(BaseCase):
+
+    def test_delay_doubles_per_attempt(self):
+        self.assertEqual([backoff_delay(n, 60) for n in (1, 2, 3, 4)], [60, 120, 240, 480])
+
+    def test_delay_before_first_attempt_is_base(self):
+        self.assertEqual(backoff_delay(0, 60), 60)
+        self.assertEqual(backoff_delay(None, 60), 60)
+
+    def test_delay_is_capped(self):
+        self.assertEqual(backoff_delay(30, 60, cap_seconds=3600), 3600)
+
+    def test_next_attempt_at(self):
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        self.assertEqual(next_attempt_at(now, 3, 10), now + timedelta(seconds=40))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import BaseCase
+
+from ..utils.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from .common import FakeClock
+
+
+class TestCircuitBreaker(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(threshold=3, reset_seconds=30, clock=self.clock)
+
+    def _fail(self, times):
+        for _i in range(times):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self._fail(1)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.rejected, 1)
+        self.assertEqual(self.breaker.retry_in(), 30)
+
+    def test_success_resets_the_failure_count(self):
+        self._fail(2)
+        self.breaker.record_success()
+        self._fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_lets_one_probe_through(self):
+        self._fail(3)
+        self.clock.advance(30)
+        self.assertEqual(self.breaker.retry_in(), 0)
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # a second caller waits for the probe
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_success_closes(self):
+        self._fail(3)
+        self.clock.advance(30)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_probe_failure_opens_again(self):
+        self._fail(3)
+        self.clock.advance(30)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.times_opened, 2)
+        self.assertEqual(self.breaker.retry_in(), 30)
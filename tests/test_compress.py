@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import json
+import zlib
+
+from odoo.tests.common import BaseCase
+
+from ..utils.compress import compress_bytes, compress_text, decompress_text
+
+
+class TestCompress(BaseCase):
+
+    def test_round_trip(self):
+        text = json.dumps({
+            "orderNumber": "S00042",
+            "orderLines": [{"SKU": "ABC-1", "quantity": 2}],
+            "shipToAddress": {"firstName": "Jan", "city": "Utrecht", "street": "Ümlautstraße"},
+        }, ensure_ascii=False)
+        packed = compress_text(text)
+        self.assertIsInstance(packed, bytes)
+        self.assertLess(len(packed), len(text.encode("utf-8")))
+        self.assertEqual(decompress_text(packed), text)
+
+    def test_memoryview_from_raw_sql(self):
+        self.assertEqual(decompress_text(memoryview(compress_text("{}"))), "{}")
+
+    def test_plain_zlib_is_still_read(self):
+        self.assertEqual(decompress_text(zlib.compress(b'{"a": 1}')), '{"a": 1}')
+
+    def test_empty_values(self):
+        self.assertIs(compress_text(""), False)
+        self.assertIs(compress_text(None), False)
+        self.assertIs(compress_bytes(b""), False)
+        self.assertIs(decompress_text(False), False)
+        self.assertIs(decompress_text(b""), False)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..utils.pack import kit_version
+
+
+@tagged("post_install", "-at_install")
+class TestKitVersion(TransactionCase):
+
+    def _bom(self, name):
+        product = self.env["product.product"].create({"name": name, "type": "consu"})
+        return self.env["mrp.bom"].create({"product_tmpl_id": product.product_tmpl_id.id, "type": "phantom"})
+
+    def test_rolled_back_version_is_never_reused(self):
+        if "mrp.bom" not in self.env:
+            self.skipTest("mrp is not installed")
+        before = kit_version(self.env)
+        with self.assertRaises(ZeroDivisionError), self.env.cr.savepoint():
+            self._bom("Kit rolled back")
+            self.env.flush_all()
+            rolled_back = kit_version(self.env)
+            self.assertGreater(rolled_back, before)
+            1 / 0
+        self.env.invalidate_all()
+        self.assertEqual(kit_version(self.env), before)
+
+        self._bom("Kit kept")
+        self.env.flush_all()
+        self.assertGreater(kit_version(self.env), rolled_back)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+from odoo.tests.common import BaseCase
+
+from ..utils.metrics import METRICS, MetricsRegistry
+
+
+class TestMetricsRegistry(BaseCase):
+
+    def _worker(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.describe("jobs_total", "Jobs.")
+        return registry
+
+    def test_drain_empties_and_merge_restores(self):
+        registry = self._worker()
+        registry.inc("jobs_total", queue="a")
+        registry.observe("call_seconds", 0.05)
+        counters, histograms = registry.drain()
+        self.assertEqual(registry.snapshot(), ({}, {}))
+        registry.inc("jobs_total", queue="a")
+        registry.merge(counters, histograms)
+        counters, histograms = registry.snapshot()
+        self.assertEqual(counters[("jobs_total", (("queue", "a"),))], 2.0)
+        self.assertEqual(histograms[("call_seconds", ())], [1, 0, 0.05, 1])
+
+    def test_rows_of_two_processes_add_up(self):
+        totals = {}
+        for seconds in (0.05, 0.5):
+            worker = self._worker()
+            worker.inc("jobs_total", queue="a")
+            worker.observe("call_seconds", seconds, endpoint="order")
+            for name, labels, field, value in worker.to_rows(*worker.drain()):
+                totals[(name, labels, field)] = totals.get((name, labels, field), 0.0) + value
+
+        merged = MetricsRegistry.from_rows(
+            [key + (value,) for key, value in totals.items()], buckets=(0.1, 1.0), help_texts={"jobs_total": "Jobs."},
+        )
+        text = merged.render()
+        self.assertIn('jobs_total{queue="a"} 2.0', text)
+        self.assertIn('call_seconds_bucket{endpoint="order",le="0.1"} 1', text)
+        self.assertIn('call_seconds_bucket{endpoint="order",le="1.0"} 2', text)
+        self.assertIn('call_seconds_count{endpoint="order"} 2', text)
+
+    def test_gauge_families_are_not_interleaved(self):
+        text = self._worker().render([
+            ("items", {"state": "new"}, 1),
+            ("attempts", {"state": "new"}, 3),
+            ("items", {"state": "done"}, 2),
+        ])
+        names = [line.split("{")[0] for line in text.splitlines() if not line.startswith("#")]
+        self.assertEqual(names, ["items", "items", "attempts"])
+
+
+@tagged("post_install", "-at_install")
+class TestSharedMetrics(TransactionCase):
+
+    def test_flushes_add_up_in_the_table(self):
+        Metric = self.env["postnl.metric"].sudo()
+        Metric._flush_process_metrics()
+        METRICS.inc("postnl_queue_retries_total", queue="test")
+        Metric._flush_process_metrics()
+        METRICS.inc("postnl_queue_retries_total", 2, queue="test")
+        text = Metric._render()
+        self.assertIn('postnl_queue_retries_total{queue="test"} 3.0', text)
+        self.assertEqual(METRICS.snapshot(), ({}, {}))
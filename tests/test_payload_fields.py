@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestPayloadFields(TransactionCase):
+    """The web client reads with bin_size=True; the decompressed text must not depend on it."""
+
+    def test_order_log_under_bin_size(self):
+        payload = json.dumps({"orderNumber": "S00042", "orderLines": [{"SKU": "A1", "quantity": 1}]})
+        log = self.env["postnl.order.log"].create({
+            "order_name": "S00042", "request_payload": payload, "response_body": '{"status": "Accepted"}',
+        })
+        log.flush_recordset()
+        log.invalidate_recordset()
+
+        record = log.with_context(bin_size=True)
+        self.assertEqual(record.request_payload, payload)
+        self.assertEqual(record.response_body, '{"status": "Accepted"}')
+        self.assertEqual(record.read(["request_payload"])[0]["request_payload"], payload)
+
+    def test_replenishment_under_bin_size(self):
+        rec = self.env["postnl.replenishment"].create({
+            "name": "RPL-1", "merchant_code": "MRC1", "fulfilment_location": "LOC", "request_payload": '{"a": 1}',
+        })
+        rec.flush_recordset()
+        rec.invalidate_recordset()
+        self.assertEqual(rec.with_context(bin_size=True).request_payload, '{"a": 1}')
+
+    def test_shipment_job_under_bin_size(self):
+        Queue = self.env["postnl.fulfilment.shipment.queue"].sudo()
+        raw = b'{"merchantCode": "MRC1", "type": "shipment", "messageNo": "77", "orderStatus": []}'
+        job = Queue.browse(Queue.ingest_raw(raw))
+        job.invalidate_recordset()
+        self.assertEqual(job.with_context(bin_size=True).payload, raw.decode())
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..services.postnl_client import PostNLClient
+
+
+@tagged("post_install", "-at_install")
+class TestPayloadQueries(TransactionCase):
+    """Building payloads costs the same number of queries whatever the batch size."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        nl = cls.env.ref("base.nl")
+        products = cls.env["product.product"].create([
+            {"name": f"Payload Product {i}", "default_code": f"PAY-{i:03d}", "type": "consu", "weight": 0.5}
+            for i in range(20)
+        ])
+        partners = cls.env["res.partner"].create([
+            {
+                "name": f"Payload Klant {i}",
+                "street": f"Hoofdstraat {i + 1}",
+                "zip": "3511AB",
+                "city": "Utrecht",
+                "country_id": nl.id,
+            }
+            for i in range(100)
+        ])
+        cls.orders = cls.env["sale.order"].create([
+            {
+                "partner_id": partners[i].id,
+                "order_line": [
+                    (0, 0, {"product_id": products[(i + j) % len(products)].id, "product_uom_qty": 1 + j})
+                    for j in range(3)
+                ],
+            }
+            for i in range(100)
+        ])
+
+    def _build_queries(self, orders):
+        self.env.invalidate_all()
+        client = PostNLClient(self.env)
+        before = self.env.cr.sql_log_count
+        built = client._build_payloads(orders)
+        count = self.env.cr.sql_log_count - before
+        for res in built.values():
+            self.assertNotIsInstance(res, Exception)
+            self.assertTrue(res[0])
+        return count
+
+    def test_query_count_is_flat(self):
+        # warm the registry caches (config snapshot, shipping rule index, kit leaf ratios)
+        PostNLClient(self.env)._build_payloads(self.orders)
+
+        counts = {size: self._build_queries(self.orders[:size]) for size in (1, 10, 100)}
+        self.assertEqual(counts[10], counts[1], counts)
+        self.assertEqual(counts[100], counts[1], counts)
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..models import postnl_fulfilment_queue
+
+
+def shipment_message(message_no, order_no="S00001", merchant_code="MRC1"):
+    return json.dumps({
+        "merchantCode": merchant_code,
+        "type": "shipment",
+        "messageNo": message_no,
+        "date": "2024-01-02",
+        "time": "10:00:00",
+        "orderStatus": [{"orderNo": order_no, "status": "Shipped", "trackAndTraceCode": "3STEST"}],
+    }).encode("utf-8")
+
+
+@tagged("post_install", "-at_install")
+class TestShipmentQueue(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Queue = cls.env["postnl.fulfilment.shipment.queue"].sudo()
+
+    def test_triggers_in_a_burst_are_postponed_not_dropped(self):
+        cron = self.env.ref("postnl_odoo_integration.ir_cron_postnl_process_shipment_queue")
+        Trigger = self.env["ir.cron.trigger"].sudo()
+        Trigger.search([("cron_id", "=", cron.id)]).unlink()
+        dbname = self.env.cr.dbname
+        postnl_fulfilment_queue._last_trigger.pop(dbname, None)
+        postnl_fulfilment_queue._postponed_trigger.pop(dbname, None)
+
+        before = fields.Datetime.now()
+        for _i in range(5):
+            self.Queue._trigger_processing()
+        triggers = Trigger.search([("cron_id", "=", cron.id)], order="call_at")
+        # one right away, one at the end of the debounce window for the rest
+        self.assertEqual(len(triggers), 2)
+        self.assertGreater(triggers[1].call_at, before)
+
+    def test_ingest_stores_metadata(self):
+        job = self.Queue.browse(self.Queue.ingest_raw(shipment_message("101")))
+        self.assertEqual(job.state, "new")
+        self.assertEqual(job.message_no, "101")
+        self.assertEqual(job.merchant_code, "MRC1")
+        self.assertEqual(job.message_key, "MRC1:101")
+        self.assertEqual(job._parse_payload()["orderStatus"][0]["orderNo"], "S00001")
+
+    def test_ingest_drops_retried_messages(self):
+        self.assertTrue(self.Queue.ingest_raw(shipment_message("102")))
+        # PostNL retry: same merchantCode + messageNo, even with another body
+        self.assertIsNone(self.Queue.ingest_raw(shipment_message("102", order_no="S00002")))
+        # same messageNo from another merchant is another message
+        self.assertTrue(self.Queue.ingest_raw(shipment_message("102", merchant_code="MRC2")))
+        self.assertEqual(self.Queue.search_count([("message_no", "=", "102")]), 2)
+
+    def test_ingest_without_message_no_dedupes_on_body(self):
+        raw = b'{"merchantCode": "MRC1", "orderStatus": []}'
+        self.assertTrue(self.Queue.ingest_raw(raw))
+        self.assertIsNone(self.Queue.ingest_raw(raw))
+        self.assertTrue(self.Queue.ingest_raw(b'{"merchantCode": "MRC1", "orderStatus": [], "x": 1}'))
+
+    def test_claim_only_due_jobs_oldest_first(self):
+        self.Queue.search([]).unlink()
+        ids = [self.Queue.ingest_raw(shipment_message(str(200 + i))) for i in range(5)]
+        jobs = self.Queue.browse(ids)
+        now = fields.Datetime.now()
+        for i, job in enumerate(jobs):
+            # distinct create_date so the claim order is deterministic
+            job.env.cr.execute(
+                "UPDATE postnl_fulfilment_shipment_queue SET create_date = %s WHERE id = %s",
+                (now - timedelta(minutes=10 - i), job.id),
+            )
+        jobs[1].write({"state": "failed", "next_attempt_at": now + timedelta(hours=1)})  # backing off
+        jobs[2].write({"state": "failed", "next_attempt_at": now - timedelta(minutes=1)})  # due again
+        jobs[3].state = "done"
+        jobs[4].state = "dead"
+
+        claimed = self.Queue._claim_jobs(10)
+        self.assertEqual(claimed.ids, [jobs[0].id, jobs[2].id])
+        self.assertEqual(self.Queue._claim_jobs(1).ids, [jobs[0].id])
+
+        due, next_retry = self.Queue._backlog()
+        self.assertEqual(due, 2)
+        self.assertEqual(next_retry, jobs[1].next_attempt_at)
+
+    def test_failed_jobs_back_off_then_die(self):
+        config = self.env["postnl.config"].get_snapshot()
+        job = self.Queue.browse(self.Queue.ingest_raw(shipment_message("300")))
+        job.attempts = 1
+        job._mark_failed("boom", config)
+        self.assertEqual(job.state, "failed")
+        self.assertGreater(job.next_attempt_at, fields.Datetime.now())
+
+        job.attempts = config.queue_max_attempts
+        job._mark_failed("boom", config)
+        self.assertEqual(job.state, "dead")
+        self.assertFalse(job.next_attempt_at)
+        self.assertNotIn(job, self.Queue._claim_jobs(100))
+
+
+@tagged("post_install", "-at_install")
+class TestOutboundQueue(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Outbound = cls.env["postnl.outbound.queue"].sudo()
+        partner = cls.env["res.partner"].create({"name": "Queue Test Customer"})
+        product = cls.env["product.product"].create({"name": "Queue Test Product", "default_code": "QTP-1"})
+        cls.orders = cls.env["sale.order"].create([
+            {"partner_id": partner.id, "order_line": [(0, 0, {"product_id": product.id, "product_uom_qty": 1})]}
+            for _i in range(2)
+        ])
+
+    def test_enqueue_skips_orders_already_waiting(self):
+        first = self.Outbound.enqueue_orders(self.orders[0])
+        self.assertEqual(len(first), 1)
+        second = self.Outbound.enqueue_orders(self.orders)
+        self.assertEqual(second.sale_order_id, self.orders[1])
+        self.assertEqual(self.Outbound.search_count([("sale_order_id", "in", self.orders.ids)]), 2)
+
+    def test_enqueue_again_once_done(self):
+        job = self.Outbound.enqueue_orders(self.orders[0])
+        job.state = "done"
+        self.assertEqual(len(self.Outbound.enqueue_orders(self.orders[0])), 1)
+
+    def test_claim_due(self):
+        jobs = self.Outbound.enqueue_orders(self.orders)
+        jobs[0].write({"state": "failed", "attempts": 5})
+        self.assertEqual(self.Outbound._claim_due(10, max_attempts=5), jobs[1])
+
+        jobs[1].state = "processing"
+        self.assertFalse(self.Outbound._claim_due(10, max_attempts=5))
+        # a worker died with the batch in flight
+        self.env.cr.execute(
+            "UPDATE postnl_outbound_queue SET write_date = %s WHERE id = %s",
+            (fields.Datetime.now() - timedelta(hours=2), jobs[1].id),
+        )
+        jobs[1].invalidate_recordset()
+        self.assertEqual(self.Outbound._claim_due(10, max_attempts=5), jobs[1])
+
+    def test_claim_due_waits_for_scheduled_at(self):
+        jobs = self.Outbound.enqueue_orders(self.orders)
+        jobs[0].scheduled_at = fields.Datetime.now() + timedelta(minutes=5)
+        self.assertEqual(self.Outbound._claim_due(10, max_attempts=5), jobs[1])
+
+    def test_unconfirmed_orders_are_not_sent(self):
+        jobs = self.Outbound.enqueue_orders(self.orders)
+        self.orders[1].write({"state": "sale"})
+        self.assertEqual(jobs._cancel_unconfirmed(), jobs[1])
+        self.assertEqual(jobs.mapped("state"), ["cancelled", "new"])
+        self.assertEqual(self.orders[0].postnl_last_result, "cancelled")
+
+    def test_fail_batch_dead_letters_exhausted_jobs(self):
+        jobs = self.Outbound.enqueue_orders(self.orders)
+        jobs[0].attempts = 5
+        jobs[1].attempts = 2
+        jobs._fail_batch(ValueError("no merchant code"), max_attempts=5)
+        self.assertEqual(jobs.mapped("state"), ["dead", "failed"])
+        # a dead job is not pending: the order can be queued again
+        self.assertEqual(len(self.Outbound.requeue_orders(self.orders[0])), 1)
+
+    def test_requeue_reuses_pending_jobs(self):
+        jobs = self.Outbound.enqueue_orders(self.orders)
+        jobs[0].write({"state": "failed", "attempts": 5, "last_error": "boom"})
+        jobs[1].state = "processing"
+        at = fields.Datetime.now() + timedelta(minutes=1)
+
+        queued = self.Outbound.requeue_orders(self.orders, scheduled_at=at)
+        # the in-flight job is left alone, the failed one starts over
+        self.assertEqual(queued, jobs[0])
+        self.assertRecordValues(jobs, [
+            {"state": "new", "attempts": 0, "last_error": False, "scheduled_at": at},
+            {"state": "processing", "attempts": 0, "last_error": False, "scheduled_at": False},
+        ])
+        self.assertEqual(self.Outbound.search_count([("sale_order_id", "in", self.orders.ids)]), 2)
+
+        jobs[0].state = "done"
+        self.assertEqual(len(self.Outbound.requeue_orders(self.orders[0])), 1)
+        self.assertEqual(self.Outbound.search_count([("sale_order_id", "=", self.orders[0].id)]), 2)
+
+
+@tagged("post_install", "-at_install")
+class TestReplenishmentQueue(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Replenishment = cls.env["postnl.replenishment"].sudo()
+
+    def _create(self, count):
+        return self.Replenishment.create([
+            {"name": f"RPL-{i}", "merchant_code": "MRC1", "fulfilment_location": "LOC"}
+            for i in range(count)
+        ])
+
+    def test_claim_due(self):
+        self.Replenishment.search([]).unlink()
+        recs = self._create(4)
+        now = fields.Datetime.now()
+        recs[1].write({"state": "error", "next_attempt_at": now + timedelta(hours=1)})
+        recs[2].state = "sent"
+        recs[3].write({"state": "error", "next_attempt_at": now - timedelta(minutes=1)})
+        self.assertEqual(set(self.Replenishment._claim_due(10).ids), {recs[0].id, recs[3].id})
+
+    def test_mark_failed_dead_letters_after_last_attempt(self):
+        config = self.env["postnl.config"].get_snapshot()
+        rec = self._create(1)
+        rec.attempts = config.queue_max_attempts
+        rec._mark_failed("boom", config)
+        self.assertEqual(rec.state, "dead")
+        self.assertFalse(self.Replenishment._claim_due(10) & rec)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from odoo.tests.common import BaseCase
+
+from ..utils.ratelimit import SharedTokenBucket, TokenBucket, parse_retry_after
+from .common import FakeClock
+
+
+class TestTokenBucket(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=10, burst=3, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_then_rate(self):
+        self.assertEqual([self.bucket.acquire() for _i in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(self.bucket.acquire(), 0.1)
+        self.assertAlmostEqual(self.bucket.acquire(), 0.1)
+        self.assertEqual(self.bucket.stats()["acquired"], 5)
+
+    def test_refill_is_capped_by_burst(self):
+        for _i in range(3):
+            self.bucket.acquire()
+        self.clock.advance(60)
+        self.assertEqual([self.bucket.acquire() for _i in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(self.bucket.acquire(), 0.0)
+
+    def test_average_rate(self):
+        for _i in range(103):
+            self.bucket.acquire()
+        # 3 tokens of burst, then 100 at 10/s
+        self.assertAlmostEqual(self.clock.now - 1000.0, 10.0, places=6)
+
+    def test_pause_blocks_every_caller_without_burst_after(self):
+        self.bucket.pause(5)
+        # the bucket restarts empty: the first token comes one interval after the pause
+        self.assertAlmostEqual(self.bucket.acquire(), 5.1)
+        self.assertAlmostEqual(self.bucket.acquire(), 0.1)
+
+    def test_shorter_pause_does_not_shorten_a_longer_one(self):
+        self.bucket.pause(5)
+        self.bucket.pause(1)
+        self.assertAlmostEqual(self.bucket.acquire(), 5.1)
+
+
+class TestSharedTokenBucket(BaseCase):
+    """Two workers on one store: a TokenBucket standing in for the postnl.rate.bucket row."""
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.store = TokenBucket(rate=10, burst=4, clock=self.clock, sleep=self.clock.sleep)
+        self.calls = []
+
+    def _reserve(self, n):
+        self.calls.append(n)
+        return max(self.store._reserve() for _i in range(n))
+
+    def _worker(self, lease=1, lease_ttl=1.0):
+        return SharedTokenBucket(
+            10, 4, reserve=self._reserve, pause_shared=self.store.pause, lease=lease, lease_ttl=lease_ttl,
+            clock=self.clock, sleep=self.clock.sleep,
+        )
+
+    def test_workers_share_one_rate(self):
+        first, second = self._worker(), self._worker()
+        for _i in range(52):
+            first.acquire()
+            second.acquire()
+        # 4 tokens of burst, then 100 at 10/s for both workers together
+        self.assertAlmostEqual(self.clock.now - 1000.0, 10.0, places=6)
+
+    def test_lease_serves_tokens_locally(self):
+        worker = self._worker(lease=2)
+        self.assertEqual([worker.acquire() for _i in range(4)], [0.0, 0.0, 0.0, 0.0])
+        self.assertEqual(self.calls, [2, 2])
+        # the third lease waits for the shared bucket; its second token costs nothing more
+        self.assertAlmostEqual(worker.acquire(), 0.2)
+        self.assertEqual(worker.acquire(), 0.0)
+
+    def test_expired_lease_is_dropped(self):
+        worker = self._worker(lease=2, lease_ttl=1.0)
+        worker.acquire()
+        self.clock.advance(2)
+        worker.acquire()
+        self.assertEqual(self.calls, [2, 2])
+
+    def test_pause_is_shared(self):
+        first, second = self._worker(), self._worker()
+        first.pause(5)
+        self.assertAlmostEqual(second.acquire(), 5.1)
+
+    def test_store_failure_falls_back_to_local_bucket(self):
+        def broken(_n):
+            raise RuntimeError("no database")
+
+        worker = SharedTokenBucket(
+            10, 2, reserve=broken, pause_shared=broken, clock=self.clock, sleep=self.clock.sleep,
+        )
+        self.assertEqual([worker.acquire() for _i in range(2)], [0.0, 0.0])
+        self.assertAlmostEqual(worker.acquire(), 0.1)
+        worker.pause(1)
+        self.assertEqual(worker.stats()["store_errors"], 4)
+
+
+class TestParseRetryAfter(BaseCase):
+
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertEqual(parse_retry_after(" 1.5 "), 1.5)
+        self.assertEqual(parse_retry_after("-3"), 0.0)
+
+    def test_http_date(self):
+        now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        value = format_datetime(now + timedelta(seconds=30), usegmt=True)
+        self.assertEqual(parse_retry_after(value, now=now), 30.0)
+        self.assertEqual(parse_retry_after(format_datetime(now - timedelta(seconds=30), usegmt=True), now=now), 0.0)
+
+    def test_missing_or_invalid(self):
+        self.assertEqual(parse_retry_after(None, default=2.0), 2.0)
+        self.assertEqual(parse_retry_after("", default=2.0), 2.0)
+        self.assertEqual(parse_retry_after("soon", default=4.0), 4.0)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests.common import BaseCase
+
+from ..utils.replenishment import aggregate_lines, part_number, split_lines
+
+
+class TestReplenishmentLines(BaseCase):
+
+    def test_aggregate_sums_per_sku_before_rounding(self):
+        lines = aggregate_lines([
+            ("A", 1.5, "Product A"),
+            ("B", 2, "Product B"),
+            ("A", 1.5, "Product A again"),
+        ])
+        self.assertEqual(lines, [
+            {"SKU": "A", "quantity": 3, "description": "Product A"},
+            {"SKU": "B", "quantity": 2, "description": "Product B"},
+        ])
+
+    def test_aggregate_drops_empty_lines(self):
+        lines = aggregate_lines([("", 5, "no sku"), ("A", 0, "no qty"), ("B", 0.4, "rounds to 0"), ("C", 1, "x" * 50)])
+        self.assertEqual(lines, [{"SKU": "C", "quantity": 1, "description": "x" * 35}])
+
+    def _lines(self, count):
+        return [{"SKU": f"SKU-{i}", "quantity": 1, "description": ""} for i in range(count)]
+
+    def test_split_by_line_count(self):
+        chunks = split_lines(self._lines(5), max_lines=2)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([line for chunk in chunks for line in chunk], self._lines(5))
+
+    def test_split_by_size(self):
+        lines = self._lines(10)
+        overhead = 100
+        max_bytes = 300
+        chunks = split_lines(lines, max_bytes=max_bytes, overhead=overhead)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(overhead + len(json.dumps(chunk)), max_bytes)
+        self.assertEqual([line for chunk in chunks for line in chunk], lines)
+
+    def test_oversized_line_gets_its_own_chunk(self):
+        big = {"SKU": "BIG", "quantity": 1, "description": "x" * 500}
+        chunks = split_lines([big] + self._lines(1), max_bytes=200)
+        self.assertEqual(chunks, [[big], self._lines(1)])
+
+    def test_no_limits_and_no_lines(self):
+        self.assertEqual(split_lines(self._lines(3)), [self._lines(3)])
+        self.assertEqual(split_lines([]), [[]])
+
+    def test_part_number(self):
+        self.assertEqual(part_number("P00001", 0, 1), "P00001")
+        self.assertEqual(part_number("P00001", 0, 3), "P00001-1")
+        self.assertEqual(part_number("P00001", 2, 3), "P00001-3")
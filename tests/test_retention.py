@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestRetention(TransactionCase):
+
+    def test_latest_log_of_an_order_is_kept(self):
+        partner = self.env["res.partner"].create({"name": "Retention Customer"})
+        order = self.env["sale.order"].create({"partner_id": partner.id})
+        now = fields.Datetime.now()
+        Log = self.env["postnl.order.log"].sudo()
+        old_failure, old_success, latest_success = Log.create([
+            {"sale_order_id": order.id, "success": False, "sent_at": now - timedelta(days=400)},
+            {"sale_order_id": order.id, "success": True, "sent_at": now - timedelta(days=200)},
+            {"sale_order_id": order.id, "success": True, "sent_at": now - timedelta(days=100)},
+        ])
+
+        self.env["postnl.retention"].run_retention()
+
+        # both older logs are superseded; the latest stays although it is past the success cutoff
+        self.assertFalse((old_failure | old_success).exists())
+        self.assertTrue(latest_success.exists())
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..utils.sku import resolve_skus
+
+
+@tagged("post_install", "-at_install")
+class TestSku(TransactionCase):
+
+    def test_name_fallback_can_be_left_out(self):
+        coded = self.env["product.product"].create({"name": "Coded", "default_code": "ab 12"})
+        barcoded = self.env["product.product"].create({"name": "Barcoded", "barcode": "8712345678906"})
+        nameless = self.env["product.product"].create({"name": "Freight charge"})
+        products = coded | barcoded | nameless
+
+        self.assertEqual(resolve_skus(products), {
+            coded.id: "AB12", barcoded.id: "8712345678906", nameless.id: "FREIGHTCHARGE",
+        })
+        self.assertEqual(resolve_skus(products, fallback=False), {
+            coded.id: "AB12", barcoded.id: "8712345678906", nameless.id: "",
+        })
+        self.assertEqual(products.mapped("postnl_sku_from_name"), [False, False, True])
+
+        # read from the stored columns, kept in sync when a code is added
+        nameless.default_code = "frt-1"
+        self.assertEqual(resolve_skus(nameless, fallback=False), {nameless.id: "FRT-1"})
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import BaseCase
+
+from ..utils.webhook import extract_meta, looks_like_json_object, message_key
+
+
+class TestWebhookMeta(BaseCase):
+
+    def test_extract_meta(self):
+        raw = (
+            b'{"merchantCode": "MRC1", "type": "shipment", "messageNo": 42, "date": "2024-01-02",'
+            b' "time": "10:11:12", "orderStatus": [{"orderNo": "S1", "shipDate": "2024-01-03"}]}'
+        )
+        self.assertEqual(extract_meta(raw), {
+            "messageNo": "42", "merchantCode": "MRC1", "date": "2024-01-02", "time": "10:11:12",
+        })
+
+    def test_nested_keys_do_not_match(self):
+        meta = extract_meta(b'{"orderStatus": [{"shipDate": "2024-01-03", "shipTime": "08:00"}]}')
+        self.assertIsNone(meta["date"])
+        self.assertIsNone(meta["time"])
+        self.assertIsNone(meta["messageNo"])
+
+    def test_nested_key_before_the_top_level_one(self):
+        raw = (
+            b'{"orderStatus": [{"orderNo": "S1", "messageNo": "line-1", "date": "2024-01-03",'
+            b' "merchantCode": "OTHER"}], "merchantCode": "MRC1", "messageNo": "42", "date": "2024-01-02"}'
+        )
+        self.assertEqual(extract_meta(raw), {
+            "messageNo": "42", "merchantCode": "MRC1", "date": "2024-01-02", "time": None,
+        })
+
+    def test_invalid_body_has_no_meta(self):
+        self.assertEqual(extract_meta(b'{"messageNo": "42", '), dict.fromkeys(("messageNo", "merchantCode", "date", "time")))
+        self.assertIsNone(extract_meta(b'[{"messageNo": "42"}]')["messageNo"])
+
+    def test_escaped_strings_are_decoded(self):
+        meta = extract_meta(b'{"merchantCode": "M\\"RC\\u00e9", "messageNo": "7"}')
+        self.assertEqual(meta["merchantCode"], 'M"RCé')
+
+    def test_message_key(self):
+        self.assertEqual(message_key({"merchantCode": "MRC1", "messageNo": "42"}, b"{}"), "MRC1:42")
+        body_key = message_key({"messageNo": None}, b'{"a": 1}')
+        self.assertTrue(body_key.startswith("sha1:"))
+        self.assertEqual(body_key, message_key({}, b'{"a": 1}'))
+        self.assertNotEqual(body_key, message_key({}, b'{"a": 2}'))
+
+    def test_looks_like_json_object(self):
+        self.assertTrue(looks_like_json_object(b' {"a": 1}\n'))
+        self.assertFalse(looks_like_json_object(b"[1, 2]"))
+        self.assertFalse(looks_like_json_object(b""))
@@ -1,2 +1,10 @@
 from . import pack
-from . import sku
\ No newline at end of file
+from . import sku
+from . import webhook
+from . import backoff
+from . import compress
+from . import replenishment
+from . import ratelimit
+from . import circuit
+from . import metrics
+from . import address
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import re
+import threading
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+_STREET_HOUSE_NUMBER = re.compile(r"^(.*?)(?:\s+(\d+))(?:\s*([A-Za-z0-9\-\/]+))?$")
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+def split_street(street: str, street2: str = ""):
+    """Best-effort split of Odoo street into (street, houseNumber, addition)."""
+    full = " ".join([s for s in [street, street2] if s])
+    full = _WHITESPACE.sub(" ", full).strip()
+    m = _STREET_HOUSE_NUMBER.match(full)
+    if not m:
+        return full[:30], 0, ""
+    return (m.group(1) or "").strip()[:30], int(m.group(2) or 0), (m.group(3) or "")[:30]
+
+
+def split_name(name: str):
+    name = (name or "").strip()
+    if not name:
+        return "", ""
+    parts = name.split()
+    return parts[0], " ".join(parts[1:]) if len(parts) > 1 else ""
+
+
+def parse_address(name, street, street2):
+    """(firstName, lastName, street, houseNumber, houseNumberAddition)"""
+    first, last = split_name(name)
+    street, house_number, addition = split_street(street, street2)
+    return first, last, street, house_number, addition
+
+
+class LRUCache:
+    """Thread-safe dict with a maximum size; the least recently used key goes first."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > max(self.maxsize, 0):
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# per worker process, shared by every database it serves; the key holds the
+# database and the parsed fields themselves, so stale entries are never hit
+_address_cache = LRUCache()
+
+
+def _cache_key(dbname, partner):
+    # write_date alone misses two edits in one transaction (it does not move)
+    return (dbname, partner.id, partner.write_date, hash((partner.name, partner.street, partner.street2)))
+
+
+def parse_partner(partner):
+    """Cached parse_address of one res.partner."""
+    return parse_partners(partner).get(partner.id) if partner else parse_address("", "", "")
+
+
+def parse_partners(partners, maxsize=None):
+    """
+    Bulk variant: {partner_id: parse_address(...)} for a recordset, reading
+    name / street / street2 / write_date in one prefetch and parsing only the
+    partners that changed since they were cached.
+    """
+    if maxsize is not None and maxsize != _address_cache.maxsize:
+        _address_cache.resize(maxsize)
+
+    dbname = partners.env.cr.dbname
+    parsed = {}
+    for partner in partners:
+        # unsaved records have no stable key
+        key = _cache_key(dbname, partner) if isinstance(partner.id, int) else None
+        value = _address_cache.get(key) if key else None
+        if value is None:
+            value = parse_address(partner.name, partner.street, partner.street2)
+            if key:
+                _address_cache.put(key, value)
+        parsed[partner.id] = value
+    return parsed
+
+
+def cache_stats():
+    return {"size": len(_address_cache), "maxsize": _address_cache.maxsize,
+            "hits": _address_cache.hits, "misses": _address_cache.misses}
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+
+def backoff_delay(attempts: int, base_seconds: int = 60, cap_seconds: int = 86400) -> int:
+    """Exponential backoff: base, 2*base, 4*base, ... after 1, 2, 3 ... failed attempts, capped."""
+    attempts = max(int(attempts or 0), 1)
+    return int(min(base_seconds * (2 ** (attempts - 1)), cap_seconds))
+
+
+def next_attempt_at(now, attempts: int, base_seconds: int = 60, cap_seconds: int = 86400):
+    return now + timedelta(seconds=backoff_delay(attempts, base_seconds, cap_seconds))
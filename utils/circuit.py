@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+    def __init__(self, endpoint, retry_in):
+        super().__init__(f"PostNL endpoint {endpoint} unavailable (circuit open), retry in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker.
+
+    closed: calls go through; `threshold` consecutive failures open it.
+    open: calls are refused until `reset_seconds` have passed.
+    half-open: one probe call at a time; success closes the breaker,
+    failure opens it again for another `reset_seconds`.
+    """
+
+    def __init__(self, threshold=5, reset_seconds=30.0, clock=time.monotonic):
+        self.threshold = max(int(threshold), 1)
+        self.reset_seconds = float(reset_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    def _retry_in(self, now):
+        if self.state == CLOSED:
+            return 0.0
+        if self.state == OPEN:
+            return max(self.opened_at + self.reset_seconds - now, 0.0)
+        # half-open: wait for the running probe
+        return self.reset_seconds if self._probing else 0.0
+
+    def retry_in(self):
+        """Seconds until a call would be let through (0 = now); does not take the probe slot."""
+        with self._lock:
+            return self._retry_in(self._clock())
+
+    def allow(self):
+        """True if the caller may call the endpoint now (in half-open: the caller becomes the probe)."""
+        with self._lock:
+            now = self._clock()
+            if self.state == OPEN and now - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = self._clock()
+                self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_in": round(self._retry_in(self._clock()), 1),
+            }
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import zlib
+
+# Payload columns are fields.Binary(attachment=False) holding raw compressed
+# bytes (not base64): Binary.convert_to_column passes bytes through to the
+# bytea column unchanged, and nothing renders these fields with a binary widget.
+#
+# Most payloads are a few hundred bytes of JSON with the same keys, too small
+# for plain zlib to find repetitions in. Compressing against a preset
+# dictionary of those keys roughly doubles the ratio on them.
+# Format: b"\x01" + zlib stream using _ZDICT_V1. A plain zlib stream (first
+# byte 0x78) is still accepted when reading.
+
+DEFAULT_LEVEL = 6
+
+_FORMAT_ZDICT_V1 = b"\x01"
+
+# Never change this value: stored rows depend on it. Add a new version instead.
+_ZDICT_V1 = (
+    b'{"orderNumber": "", "webOrderNumber": "", "merchantCode": "", "fulfilmentLocation": "", '
+    b'"channel": "", "productCode": "", "orderDateTime": "", "orderLines": [{"SKU": "", "quantity": }], '
+    b'"shipToAddress": {"firstName": "", "lastName": "", "street": "", "houseNumber": , '
+    b'"houseNumberAddition": "", "postalCode": "", "city": "", "countryCode": "NL", '
+    b'"phoneNumber": "+316", "email": "@"}, "invoiceAddress": {"type": "shipment", "messageNo": '
+    b'"date": "time": "orderStatus": [{"orderNo": "shipDate": "shipTime": "trackAndTraceCode": "3S'
+    b'"orderDate": "plannedReceiptDate": "description": "status": "Accepted", "messages": []}'
+)
+
+
+def compress_bytes(data: bytes, level=DEFAULT_LEVEL):
+    if not data:
+        return False
+    compressor = zlib.compressobj(level, zdict=_ZDICT_V1)
+    return _FORMAT_ZDICT_V1 + compressor.compress(data) + compressor.flush()
+
+
+def compress_text(text, level=DEFAULT_LEVEL):
+    """str -> compressed bytes for a payload column (False for empty values)."""
+    if not text:
+        return False
+    return compress_bytes(text.encode("utf-8"), level)
+
+
+def decompress_text(value):
+    """Compressed bytes (or memoryview from a raw SQL read) -> str; empty values -> False."""
+    if not value:
+        return False
+    value = bytes(value)
+    if value[:1] == _FORMAT_ZDICT_V1:
+        decompressor = zlib.decompressobj(zdict=_ZDICT_V1)
+        data = decompressor.decompress(value[1:]) + decompressor.flush()
+    else:
+        data = zlib.decompress(value)
+    return data.decode("utf-8")
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# seconds; covers a cached lookup up to a slow PostNL call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named stage."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.add(name, self._clock() - started)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def as_ms(self, share=1.0):
+        """{stage: milliseconds}; share spreads a batch's stage time over its orders."""
+        return {name: round(seconds * share * 1000.0, 3) for name, seconds in self.seconds.items()}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters and histograms, rendered in Prometheus text format.
+
+    Values live in the memory of one worker process until drain() hands
+    them over to a shared store (postnl.metric), which adds up every
+    process; from_rows() rebuilds a registry from that store to render it.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def help_texts(self):
+        return dict(self._help)
+
+    def inc(self, name, value=1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                # per-bucket counts, then sum and count
+                hist = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += seconds
+            hist[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counters), {key: list(value) for key, value in self._histograms.items()}
+
+    def drain(self):
+        """Take every value recorded so far, leaving the registry empty: (counters, histograms)."""
+        with self._lock:
+            counters, histograms = self._counters, self._histograms
+            self._counters, self._histograms = {}, {}
+        return counters, histograms
+
+    def merge(self, counters, histograms):
+        """Add values back, e.g. drained ones the store could not take."""
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0.0) + value
+            for key, hist in histograms.items():
+                mine = self._histograms.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+                for i, value in enumerate(hist):
+                    mine[i] += value
+
+    def to_rows(self, counters, histograms):
+        """
+        Drained values as (name, labels, field, value) rows, sorted: labels is
+        the JSON of the label pairs, field is "" for a counter and a bucket
+        bound (non-cumulative count), "sum" or "count" for a histogram.
+        """
+        rows = [(name, json.dumps(labels), "", value) for (name, labels), value in counters.items()]
+        for (name, labels), hist in histograms.items():
+            encoded = json.dumps(labels)
+            rows.extend((name, encoded, repr(bound), hist[i]) for i, bound in enumerate(self.buckets) if hist[i])
+            rows.append((name, encoded, "sum", hist[-2]))
+            rows.append((name, encoded, "count", hist[-1]))
+        return sorted(rows)
+
+    @classmethod
+    def from_rows(cls, rows, buckets=DEFAULT_BUCKETS, help_texts=None):
+        """Registry holding the totals of to_rows() rows (as summed up by the store)."""
+        registry = cls(buckets)
+        registry._help = dict(help_texts or {})
+        index = {repr(bound): i for i, bound in enumerate(registry.buckets)}
+        for name, labels, field, value in rows:
+            key = (name, tuple(tuple(pair) for pair in json.loads(labels)))
+            if not field:
+                registry._counters[key] = value
+                continue
+            hist = registry._histograms.setdefault(key, [0] * len(registry.buckets) + [0.0, 0])
+            if field == "sum":
+                hist[-2] = value
+            elif field == "count":
+                hist[-1] = int(value)
+            elif field in index:
+                hist[index[field]] = int(value)
+        return registry
+
+    def render(self, gauges=()):
+        """Prometheus text exposition; gauges: [(name, {labels}, value)] computed by the caller."""
+        counters, histograms = self.snapshot()
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name in seen:
+                return
+            seen.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        # every sample of a family under its own HELP / TYPE block
+        order = {}
+        for name, _gauge_labels, _value in gauges:
+            order.setdefault(name, len(order))
+        for name, labels, value in sorted(gauges, key=lambda gauge: order[gauge[0]]):
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(sorted(labels.items()))} {value}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for (name, labels), hist in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets, hist):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, {'le': repr(bound)})} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, {'le': '+Inf'})} {hist[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {hist[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {hist[-1]}")
+
+        return "\n".join(lines) + "\n"
+
+
+# one registry per worker process
+METRICS = MetricsRegistry()
+METRICS.describe("postnl_stage_seconds", "Duration of one processing stage of a PostNL batch.")
+METRICS.describe("postnl_http_request_seconds", "Duration of one PostNL HTTP call, throttling and retries included.")
+METRICS.describe("postnl_requests_total", "PostNL calls by endpoint and outcome.")
+METRICS.describe("postnl_http_retries_total", "PostNL calls retried after a 429 answer.")
+METRICS.describe("postnl_queue_retries_total", "Queue items scheduled for another attempt.")
+METRICS.describe("postnl_queue_dead_total", "Queue items given up after their last attempt.")
+METRICS.describe("postnl_shipment_jobs_total", "Shipment queue jobs processed.")
+METRICS.describe("postnl_queue_items", "Queue items by state.")
+METRICS.describe("postnl_queue_attempts", "Attempts spent by the queue items of a state.")
+METRICS.describe("postnl_circuit_open", "1 while the circuit breaker of an endpoint is open in this process.")
@@ -51,36 +51,118 @@ def _get_oca_pack_lines(env, product):
     return PackLine.search([("parent_product_id", "=", product.id)])
 
 
-def explode_product(env, product, qty, visited=None):
+# kit definition models; mrp and product_pack are both optional
+KIT_MODELS = ("mrp.bom", "mrp.bom.line", "product.pack.line")
+
+
+def install_kit_version_triggers(env):
     """
-    Returns list of tuples: [(leaf_product, leaf_qty_float), ...]
+    Keep a one-row counter (postnl_kit_version) set by a statement-level
+    trigger on every kit definition table present. mrp / product_pack are
+    optional, so their write methods cannot be overridden; the trigger sees
+    every create, write, archive and delete, ORM or SQL. Called on each
+    registry load, so a kit module installed after this one is covered too.
+
+    The new value comes from a sequence, which a rollback does not undo: a
+    transaction that changed kits and rolled back never hands its number
+    to the next committed change (see kit_version).
+    """
+    cr = env.cr
+    cr.execute(
+        """
+        SELECT to_regclass('postnl_kit_version'), to_regclass('postnl_kit_version_seq'),
+               (SELECT prosrc FROM pg_proc WHERE oid = to_regproc('postnl_bump_kit_version'))
+        """
+    )
+    has_table, has_sequence, function_src = cr.fetchone()
+    if not has_table:
+        cr.execute("CREATE TABLE postnl_kit_version (id integer PRIMARY KEY, version bigint NOT NULL)")
+        cr.execute("INSERT INTO postnl_kit_version (id, version) VALUES (1, 0)")
+    if not has_sequence:
+        cr.execute("CREATE SEQUENCE postnl_kit_version_seq")
+        # continue after the versions a counter-only install handed out already
+        cr.execute(
+            "SELECT setval('postnl_kit_version_seq', COALESCE((SELECT max(version) FROM postnl_kit_version), 0) + 1, false)"
+        )
+    if not function_src or "nextval" not in function_src:
+        cr.execute(
+            """
+            CREATE OR REPLACE FUNCTION postnl_bump_kit_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE postnl_kit_version SET version = nextval('postnl_kit_version_seq') WHERE id = 1;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+
+    for model in KIT_MODELS:
+        if model not in env:
+            continue
+        table = env[model]._table
+        trigger = f"{table}_postnl_kit_version"
+        cr.execute("SELECT 1 FROM pg_trigger WHERE tgname = %s AND tgrelid = %s::regclass", (trigger, table))
+        if cr.fetchone():
+            continue
+        cr.execute(
+            f'CREATE TRIGGER "{trigger}" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}" '
+            f"FOR EACH STATEMENT EXECUTE PROCEDURE postnl_bump_kit_version()"
+        )
+        _logger.info("[PostNL][PACK] Kit version trigger installed on %s", table)
+
+
+def uninstall_kit_version_triggers(cr):
+    """Drop the triggers, function, counter and sequence of install_kit_version_triggers."""
+    cr.execute("DROP FUNCTION IF EXISTS postnl_bump_kit_version() CASCADE")
+    cr.execute("DROP TABLE IF EXISTS postnl_kit_version")
+    cr.execute("DROP SEQUENCE IF EXISTS postnl_kit_version_seq")
+
+
+def kit_version(env):
+    """
+    Version of the kit definition tables (mrp.bom, mrp.bom.line,
+    product.pack.line): one primary-key read of the counter kept up to date
+    by install_kit_version_triggers. The row is transactional, so a kit
+    change becomes visible to other workers together with the change itself;
+    its values come from a sequence, so a version seen inside a transaction
+    that rolled back is never reused for other kit definitions.
+    """
+    if not any(model in env for model in KIT_MODELS):
+        return 0
+    env.cr.execute("SELECT version FROM postnl_kit_version WHERE id = 1")
+    row = env.cr.fetchone()
+    return row[0] if row else 0
+
+
+def compute_leaf_ratios(env, product, path=frozenset()):
+    """
+    Returns {leaf_product_id: qty_per_unit} for one unit of product.
     Expands packs/kits using:
     - phantom BoM (mrp.bom type phantom)
     - OCA product_pack (product.pack.line)
+    path holds the ancestors only, so a component reached through two
+    branches (diamond BoM) is expanded on both of them.
     """
-    visited = visited or set()
-
     if not product:
-        return []
+        return {}
 
     # Prevent recursion loops
-    key = (product._name, product.id)
-    if key in visited:
+    if product.id in path:
         _logger.warning("[PostNL][PACK] Recursion detected for product %s, skipping deeper expansion.", product.display_name)
-        return [(product, qty)]
-    visited.add(key)
+        return {product.id: 1.0}
+    path = path | {product.id}
+
+    def _merge(result, comp, factor):
+        for leaf_id, ratio in compute_leaf_ratios(env, comp, path).items():
+            result[leaf_id] = result.get(leaf_id, 0.0) + ratio * factor
 
     # 1) Phantom BoM explode
     bom = _get_phantom_bom(env, product)
     if bom:
-        result = []
-        bom_qty = float(bom.product_qty or 1.0)
-        factor = (float(qty or 0.0) / bom_qty) if bom_qty else float(qty or 0.0)
-
+        result = {}
+        bom_qty = float(bom.product_qty or 1.0) or 1.0
         for bl in bom.bom_line_ids:
-            comp = bl.product_id
-            comp_qty = float(bl.product_qty or 0.0) * factor
-            result.extend(explode_product(env, comp, comp_qty, visited=visited))
+            _merge(result, bl.product_id, float(bl.product_qty or 0.0) / bom_qty)
         return result
 
     # 2) OCA product_pack explode (if present)
@@ -88,21 +170,39 @@ def explode_product(env, product, qty, visited=None):
         if "product.pack.line" in env:
             pack_lines = _get_oca_pack_lines(env, product)
             if pack_lines:
-                result = []
+                result = {}
                 for pl in pack_lines:
-                    comp = pl.product_id
-                    comp_qty = float(pl.quantity or 0.0) * float(qty or 0.0)
-                    result.extend(explode_product(env, comp, comp_qty, visited=visited))
+                    _merge(result, pl.product_id, float(pl.quantity or 0.0))
                 return result
     except Exception:
         pass
 
     # Leaf product
-    return [(product, qty)]
+    return {product.id: 1.0}
+
+
+def explode_product(env, product, qty, version=None):
+    """
+    Returns list of tuples: [(leaf_product, leaf_qty_float), ...]
+    Uses the cached leaf-ratio table of product.product, so a known kit costs
+    one dict lookup and a multiply. Pass version (see kit_version) when
+    exploding many products to read the counter once for all of them.
+    """
+    if not product:
+        return []
+    if version is None:
+        version = kit_version(env)
+
+    Product = env["product.product"]
+    qty = float(qty or 0.0)
+    return [
+        (Product.browse(leaf_id), ratio * qty)
+        for leaf_id, ratio in Product._postnl_leaf_ratios(product.id, version)
+    ]
 
 
-def explode_sale_order_line(env, sale_line):
+def explode_sale_order_line(env, sale_line, version=None):
     """Convenience: explode a sale.order.line into leaf components with qty."""
     p = sale_line.product_id
     qty = float(sale_line.product_uom_qty or 0.0)
-    return explode_product(env, p, qty)
+    return explode_product(env, p, qty, version=version)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+_logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` stored.
+
+    acquire() blocks until a token is available and returns the seconds it
+    waited. pause() empties the bucket until a moment in the future (used
+    for Retry-After), for every thread sharing the bucket.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        # tokens are accounted up to this moment; in the future while paused
+        self._updated = clock()
+        self.waited = 0.0
+        self.acquired = 0
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _reserve(self):
+        """Take a token (possibly going negative) and return how long the caller must wait."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1.0
+            self.acquired += 1
+            wait = max(self._updated - now, 0.0) + max(-self._tokens, 0.0) / self.rate
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            resume = now + seconds
+            if resume > self._updated:
+                # no burst right after the pause
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = resume
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "burst": self.burst, "acquired": self.acquired, "waited_seconds": self.waited}
+
+
+class SharedTokenBucket:
+    """Token bucket whose tokens live in a store shared by every worker process.
+
+    reserve(n) takes n tokens from the shared bucket (possibly going
+    negative, exactly like TokenBucket._reserve) and returns the seconds until
+    they are all available; pause_shared(seconds) empties it for everyone.
+    To keep the store off the hot path, tokens are taken in leases of up to
+    `lease` tokens and handed out locally; leftovers of a lease older than
+    `lease_ttl` are dropped, never returned. Nobody sleeps while holding the
+    lock. When the store fails, the process throttles itself with a local
+    TokenBucket until the next lease succeeds.
+    """
+
+    def __init__(self, rate, burst, reserve, pause_shared, lease=1, lease_ttl=1.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.lease = max(min(int(lease), int(self.burst)), 1)
+        self.lease_ttl = float(lease_ttl)
+        self._shared_reserve = reserve
+        self._shared_pause = pause_shared
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._fallback = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self._tokens = 0
+        # the leased tokens are usable from this moment on
+        self._available_at = 0.0
+        self._leased_at = None
+        self.waited = 0.0
+        self.acquired = 0
+        self.leases = 0
+        self.store_errors = 0
+        self._store_down = False
+
+    def _take_local(self, now):
+        if self._tokens and self._leased_at is not None and now - self._leased_at < self.lease_ttl:
+            self._tokens -= 1
+            return max(self._available_at - now, 0.0)
+        return None
+
+    def _reserve(self):
+        with self._lock:
+            now = self._clock()
+            wait = self._take_local(now)
+            if wait is None:
+                try:
+                    lease_wait = self._shared_reserve(self.lease)
+                except Exception as e:
+                    if not self._store_down:
+                        _logger.warning("[PostNL RateLimit] shared bucket unavailable, throttling locally: %s", e)
+                    self._store_down = True
+                    self.store_errors += 1
+                    wait = self._fallback._reserve()
+                else:
+                    self._store_down = False
+                    self.leases += 1
+                    self._tokens = self.lease - 1
+                    self._available_at = now + lease_wait
+                    self._leased_at = self._available_at
+                    wait = lease_wait
+            self.acquired += 1
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        with self._lock:
+            self._tokens = 0
+            self._fallback.pause(seconds)
+            try:
+                self._shared_pause(seconds)
+            except Exception as e:
+                self.store_errors += 1
+                _logger.warning("[PostNL RateLimit] could not pause the shared bucket: %s", e)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate": self.rate, "burst": self.burst, "acquired": self.acquired, "waited_seconds": self.waited,
+                "leases": self.leases, "store_errors": self.store_errors,
+            }
+
+
+def parse_retry_after(value, default=1.0, now=None):
+    """Retry-After header (delta-seconds or HTTP-date) -> seconds to wait (>= 0)."""
+    if not value:
+        return default
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((when - now).total_seconds(), 0.0)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import json
+
+
+def aggregate_lines(items):
+    """
+    items: iterable of (sku, qty, description)
+    -> [{"SKU", "quantity", "description"}], one line per SKU in first-seen order.
+    Quantities are summed before rounding; lines without SKU or quantity are dropped.
+    """
+    totals = {}
+    descriptions = {}
+    for sku, qty, description in items:
+        if not sku or not qty:
+            continue
+        totals[sku] = totals.get(sku, 0.0) + qty
+        descriptions.setdefault(sku, (description or "")[:35])
+
+    lines = []
+    for sku, qty in totals.items():
+        qty = int(qty)
+        if qty <= 0:
+            continue
+        lines.append({"SKU": sku, "quantity": qty, "description": descriptions[sku]})
+    return lines
+
+
+def split_lines(lines, max_lines=0, max_bytes=0, overhead=0):
+    """
+    Split order lines into chunks of at most max_lines lines and about
+    max_bytes of JSON (overhead: size of the payload without its lines).
+    0 disables a limit. Always returns at least one (possibly empty) chunk.
+    """
+    chunks = []
+    current = []
+    size = overhead
+    for line in lines:
+        line_size = len(json.dumps(line, ensure_ascii=False)) + 2
+        full = (max_lines and len(current) >= max_lines) or (max_bytes and size + line_size > max_bytes)
+        if current and full:
+            chunks.append(current)
+            current = []
+            size = overhead
+        current.append(line)
+        size += line_size
+    chunks.append(current)
+    return chunks
+
+
+def part_number(name, index, total):
+    """orderNumber of part `index` (0-based): the plain name when not split, else name-1, name-2, ..."""
+    return name if total <= 1 else f"{name}-{index + 1}"
@@ -1,15 +1,42 @@
 # -*- coding: utf-8 -*-
 import re
 
+_UNSAFE_SKU_CHARS = re.compile(r"[^A-Z0-9\-_]")
+
 
 def normalize_sku(value: str) -> str:
     """Normalize SKU similar to Monta style: remove spaces, uppercase, keep safe chars."""
     value = (value or "").strip().replace(" ", "").upper()
-    value = re.sub(r"[^A-Z0-9\-_]", "", value)
+    value = _UNSAFE_SKU_CHARS.sub("", value)
     return value
 
 
 def resolve_sku(product) -> str:
+    """SKU of one product, read from the stored product.product.postnl_sku column."""
+    if not product:
+        return ""
+    if "postnl_sku" in product._fields:
+        return product.postnl_sku or ""
+    return compute_sku(product)
+
+
+def resolve_skus(products, fallback=True) -> dict:
+    """
+    Bulk variant of resolve_sku: {product_id: sku}, one column read for the whole recordset.
+    fallback=False leaves out the display_name fallback: products without a
+    real code map to "".
+    """
+    if not products:
+        return {}
+    if "postnl_sku" in products._fields:
+        return {
+            p.id: "" if not fallback and p.postnl_sku_from_name else (p.postnl_sku or "")
+            for p in products
+        }
+    return {p.id: compute_sku(p, fallback=fallback) for p in products}
+
+
+def compute_sku(product, fallback=True) -> str:
     """
     Resolve SKU with Monta-like priority:
     1) product.monta_sku (if field exists)
@@ -17,7 +44,7 @@ def resolve_sku(product) -> str:
     3) first vendor code (seller_ids.product_code)
     4) product.barcode
     5) product.product_tmpl_id.default_code
-    Fallback: display_name
+    Fallback: display_name (unless fallback=False)
     """
     if not product:
         return ""
@@ -60,5 +87,7 @@ def resolve_sku(product) -> str:
         pass
 
     # fallback
+    if not fallback:
+        return ""
     name = getattr(product, "display_name", "") or ""
     return normalize_sku(name)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+
+# Top-level metadata of a PostNL shipment message. Only these four keys are
+# needed at ingest time, the cron works on the full document later.
+META_KEYS = ("messageNo", "merchantCode", "date", "time")
+
+
+def extract_meta(raw: bytes) -> dict:
+    """
+    Metadata of the raw webhook body, read from the top-level object only: a
+    nested key with the same name (an order line "date", say) never feeds
+    the dedupe key, wherever it appears. The body is stored as received;
+    this parse (C decoder, a few kB) is all ingest does with it. Missing or
+    non-scalar keys, and bodies that are not a JSON object, map to None.
+    """
+    try:
+        doc = json.loads(raw)
+    except ValueError:
+        doc = None
+    if not isinstance(doc, dict):
+        return dict.fromkeys(META_KEYS)
+    meta = {}
+    for key in META_KEYS:
+        value = doc.get(key)
+        meta[key] = None if value is None or isinstance(value, (dict, list, bool)) else str(value)
+    return meta
+
+
+def message_key(meta: dict, raw: bytes) -> str:
+    """
+    Idempotency key of a shipment message: merchantCode + messageNo when
+    PostNL sent a messageNo, otherwise a hash of the body.
+    """
+    if meta.get("messageNo"):
+        return f"{meta.get('merchantCode') or ''}:{meta['messageNo']}"
+    return "sha1:" + hashlib.sha1(raw).hexdigest()
+
+
+def looks_like_json_object(raw: bytes) -> bool:
+    """Sanity check done instead of a full parse: body must be a JSON object."""
+    stripped = raw.strip()
+    return stripped.startswith(b"{") and stripped.endswith(b"}")